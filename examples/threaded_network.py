@@ -2,8 +2,6 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import time
-
 from pymodbus.datastore import (
     ModbusSequentialDataBlock,
     ModbusSlaveContext,
@@ -20,14 +18,17 @@ from pretty_modbus.coils import CoilLayout, Variable
 
 PORT = 5020
 LOCALHOST = "0.0.0.0"
-GRACE = 0.1
+TIMEOUT = 1.0
+
+
+def compare(values):
+    hr = values["holding_registers"]
+    return {"discrete_inputs": {"result": hr["x"] > hr["y"]}}
 
 
 def job(context):
     """Check if ``x > y`` and write result into ``result``."""
-    hr = context.get_holding_registers()
-    result = hr["x"] > hr["y"]
-    context.set_discrete_inputs({"result": result})
+    context.transact(read=["holding_registers"], write=compare)
 
 
 def main():
@@ -62,6 +63,7 @@ def main():
         layout=server_context_layout,
         context=modbus_server_context,
         address=(LOCALHOST, 5020),
+        allow_reuse_address=True,
     )
     client = Client(
         factory=ModbusTcpClient,
@@ -71,10 +73,8 @@ def main():
     )
 
     server.start()
-    time.sleep(GRACE)
     print("Server started...")
-    client.start()
-    time.sleep(GRACE)
+    client.start(timeout=TIMEOUT)  # Wait until the server accepts the connection.
     print("Client started...")
 
     hr = client.read_holding_registers()
@@ -83,7 +83,7 @@ def main():
     assert di == {"result": False}
 
     client.write_holding_registers({"x": 5, "y": 4})
-    time.sleep(GRACE)
+    daemon.wait(TIMEOUT)  # Wait until the daemon has processed the new values.
 
     hr = client.read_holding_registers()
     assert hr == {"x": 5, "y": 4}
@@ -91,7 +91,7 @@ def main():
     assert di == {"result": True}
 
     client.write_holding_registers({"x": 4, "y": 5})
-    time.sleep(GRACE)
+    daemon.wait(TIMEOUT)
 
     hr = client.read_holding_registers()
     assert hr == {"x": 4, "y": 5}
@@ -100,7 +100,7 @@ def main():
 
     print("All ok!")
 
-    client.stop(GRACE)
+    client.stop(TIMEOUT)
     print("Client closed!")
 
     server.stop()
@@ -4,8 +4,6 @@
 
 import asyncio
 
-from copy import deepcopy
-
 from pymodbus.datastore import (
     ModbusSequentialDataBlock,
     ModbusSlaveContext,
@@ -18,18 +16,16 @@ LOCALHOST = "0.0.0.0"
 
 
 async def main():
-    modbus_slave_context = ModbusSlaveContext(
-        di=ModbusSequentialDataBlock(0, [0] * 100),
-        co=ModbusSequentialDataBlock(0, [0] * 100),
-        hr=ModbusSequentialDataBlock(0, [0] * 100),
-        ir=ModbusSequentialDataBlock(0, [0] * 100),
-        zero_mode=True,
-    )
     modbus_server_context = ModbusServerContext(
         slaves={
-            0: deepcopy(modbus_slave_context),
-            1: deepcopy(modbus_slave_context),
-            0: deepcopy(modbus_slave_context),
+            unit: ModbusSlaveContext(
+                di=ModbusSequentialDataBlock(0, [0] * 100),
+                co=ModbusSequentialDataBlock(0, [0] * 100),
+                hr=ModbusSequentialDataBlock(0, [0] * 100),
+                ir=ModbusSequentialDataBlock(0, [0] * 100),
+                zero_mode=True,
+            )
+            for unit in (0, 1)
         },
         single=False,
     )
@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import asyncio
+import socket
 
 from pymodbus.register_read_message import (
     ReadInputRegistersResponse,
@@ -14,9 +15,55 @@ from pymodbus.bit_read_message import ReadCoilsResponse, ReadDiscreteInputsRespo
 from pymodbus.bit_write_message import WriteMultipleCoilsResponse
 from pymodbus.register_write_message import WriteMultipleRegistersResponse
 
-from pretty_modbus.const import DEFAULT_SLAVE
-from pretty_modbus.layout import ServerContextLayout
-from pretty_modbus.exceptions import ModbusResponseError
+from pretty_modbus.const import DEFAULT_SLAVE, MAX_WRITE_COILS, MAX_WRITE_REGISTERS
+from pretty_modbus.layout import ServerContextLayout, coalesce_chunks
+from pretty_modbus.exceptions import (
+    ModbusResponseError,
+    NotConnectedError,
+    PendingWriteError,
+)
+
+
+# Expected function codes of successful responses.
+_FC_READ_IR = ReadInputRegistersResponse.function_code
+_FC_READ_HR = ReadHoldingRegistersResponse.function_code
+_FC_READ_CO = ReadCoilsResponse.function_code
+_FC_READ_DI = ReadDiscreteInputsResponse.function_code
+_FC_WRITE_HR = WriteMultipleRegistersResponse.function_code
+_FC_WRITE_CO = WriteMultipleCoilsResponse.function_code
+
+# Maps the pymodbus request methods to the function code of their
+# successful responses.
+_EXPECTED_FC = {
+    "read_input_registers": _FC_READ_IR,
+    "read_holding_registers": _FC_READ_HR,
+    "read_coils": _FC_READ_CO,
+    "read_discrete_inputs": _FC_READ_DI,
+    "write_registers": _FC_WRITE_HR,
+    "write_coils": _FC_WRITE_CO,
+}
+
+
+def _check_response(response, request: str) -> None:
+    """Check that ``response`` to ``request`` is not an error.
+
+    Args:
+        response: The response to check
+        request: The name of the pymodbus method used for the request
+
+    Raises:
+        ModbusResponseError: If ``response`` indicates an error
+    """
+    if response.function_code != _EXPECTED_FC[request]:
+        raise ModbusResponseError(response)
+
+
+_LAYOUT_GETTERS = {
+    "input_registers": ServerContextLayout.get_input_register_layout,
+    "holding_registers": ServerContextLayout.get_holding_register_layout,
+    "coils": ServerContextLayout.get_coil_layout,
+    "discrete_inputs": ServerContextLayout.get_discrete_input_layout,
+}
 
 
 class Protocol:
@@ -28,15 +75,31 @@ class Protocol:
         self,
         protocol: pymodbus.client.asynchronous.async_io.ModbusClientProtocol,
         layout: ServerContextLayout,
+        max_inflight: Optional[int] = None,
+        error_callback: Optional[Callable[[Exception], None]] = None,
     ):
         """
         Args:
             protocol: The `pymodbus` protocol to wrap around
             layout:
                 A ``dict`` that maps slave IDs to their slave layout
+            max_inflight:
+                The maximum number of requests (reads and writes) which
+                may be awaiting a response at the same time (unlimited
+                by default); use this if the server limits its queue
+                depth
+            error_callback:
+                Called with the error of every failed write issued with
+                ``nowait=True``; if not specified, the errors are raised
+                by ``drain``
         """
         self._protocol = protocol
         self._layout = layout
+        self._max_inflight = max_inflight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._error_callback = error_callback
+        self._pending_writes: set[asyncio.Task] = set()
+        self._write_errors: list[Exception] = []
 
     async def read_input_registers(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
@@ -62,12 +125,14 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's input register layout's range.
         """
-        slave_layout = self._layout.get_input_register_layout(unit)
-        response = await self._protocol.read_input_registers(
-            slave_layout.address, slave_layout.size, unit=unit
+        slave_layout = self._get_layout(unit, "input_registers")
+        response = await self._limit(
+            self._protocol.read_input_registers,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
         )
-        if response.function_code != ReadInputRegistersResponse.function_code:
-            raise ModbusResponseError(response)
+        _check_response(response, "read_input_registers")
         return slave_layout.decode_registers(response.registers, variables)
 
     async def read_input_register(
@@ -92,7 +157,7 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's input register layout's range.
         """
-        d = await self.read_input_registers(unit=unit)
+        d = await self.read_input_registers((var,), unit=unit)
         return d[var]
 
     async def read_holding_registers(
@@ -120,12 +185,14 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's holding register layout's range.
         """
-        slave_layout = self._layout.get_holding_register_layout(unit)
-        response = await self._protocol.read_holding_registers(
-            slave_layout.address, slave_layout.size, unit=unit
+        slave_layout = self._get_layout(unit, "holding_registers")
+        response = await self._limit(
+            self._protocol.read_holding_registers,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
         )
-        if response.function_code != ReadHoldingRegistersResponse.function_code:
-            raise ModbusResponseError(response)
+        _check_response(response, "read_holding_registers")
         return slave_layout.decode_registers(response.registers, variables)
 
     async def read_holding_register(
@@ -151,7 +218,7 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's holding register layout's range.
         """
-        d = await self.read_holding_registers(unit=unit)
+        d = await self.read_holding_registers((var,), unit=unit)
         return d[var]
 
     async def write_holding_registers(
@@ -175,19 +242,56 @@ class Protocol:
 
         This method will group values which occur back-to-back in memory
         into payload chunks in order to minimize the amount of write
-        requests to the server.
+        requests to the server. Chunks which exceed the maximum size of
+        a single write request are split between variables. The write
+        requests are sent concurrently, so a single variable which
+        exceeds the maximum size is not written atomically.
         """
-        slave_layout = self._layout.get_holding_register_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            response = await self._protocol.write_registers(
-                payload.address, payload.values, skip_encode=True, unit=unit
+        slave_layout = self._get_layout(unit, "holding_registers")
+        await self.write_holding_registers_raw(slave_layout.build_payload(values), unit)
+
+    async def write_holding_registers_raw(
+        self, chunks: Iterable[Chunk], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        """Write encoded chunks to holding register memory of ``unit``.
+
+        Args:
+            chunks:
+                The chunks to write, as returned by
+                ``RegisterLayout.build_payload`` with ``as_registers``
+                unset
+            unit: The unit to write to
+
+        Raises:
+            ModbusResponseError: If writing to the slave failed
+
+        Use this to skip encoding if you write the same values over and
+        over again. The write requests are sent concurrently. Oversized
+        chunks are split between variables if they were built by
+        ``build_payload``; see ``coalesce_chunks``.
+        """
+        payloads = coalesce_chunks(chunks, MAX_WRITE_REGISTERS)
+        responses = await asyncio.gather(
+            *(
+                self._limit(
+                    self._protocol.write_registers,
+                    payload.address,
+                    payload.values,
+                    skip_encode=True,
+                    unit=unit,
+                )
+                for payload in payloads
             )
-            if response.function_code != WriteMultipleRegistersResponse.function_code:
-                raise ModbusResponseError(response)
+        )
+        for response in responses:
+            _check_response(response, "write_registers")
 
     async def write_holding_register(
-        self, var: str, value: ValueType, unit: KeyType = DEFAULT_SLAVE
+        self,
+        var: str,
+        value: ValueType,
+        unit: KeyType = DEFAULT_SLAVE,
+        nowait: bool = False,
     ) -> None:
         """Set ``var`` in the holding register to ``value``.
 
@@ -195,6 +299,9 @@ class Protocol:
             var: The variable to modify
             value: The new value of ``var``
             unit: The unit to write to
+            nowait:
+                Return without waiting for the response of the server
+                (see ``drain`` for details)
 
         Raises:
             ModbusResponseError: If reading the slave failed
@@ -205,7 +312,14 @@ class Protocol:
                 If there is no memory layout defined for holding
                 registers
         """
-        await self.write_holding_registers({var: value}, unit)
+        if nowait:
+            # Encode right away, so that layout errors are raised here
+            # and not by ``drain``.
+            slave_layout = self._get_layout(unit, "holding_registers")
+            payload = slave_layout.build_payload({var: value})
+            await self._schedule(self.write_holding_registers_raw(payload, unit))
+        else:
+            await self.write_holding_registers({var: value}, unit)
 
     async def write_coils(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
@@ -227,19 +341,36 @@ class Protocol:
 
         This method will group values which occur back-to-back in memory
         into payload chunks in order to minimize the amount of write
-        requests to the server.
+        requests to the server. Chunks which exceed the maximum size of
+        a single write request are split between variables. The write
+        requests are sent concurrently, so a single variable which
+        exceeds the maximum size is not written atomically.
         """
-        slave_layout = self._layout.get_coil_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            response = await self._protocol.write_coils(
-                payload.address, payload.values, unit=unit
+        slave_layout = self._get_layout(unit, "coils")
+        await self._write_coil_chunks(slave_layout.build_payload(values), unit)
+
+    async def _write_coil_chunks(self, chunks: Iterable[Chunk], unit: KeyType) -> None:
+        payloads = coalesce_chunks(chunks, MAX_WRITE_COILS)
+        responses = await asyncio.gather(
+            *(
+                self._limit(
+                    self._protocol.write_coils,
+                    payload.address,
+                    payload.values,
+                    unit=unit,
+                )
+                for payload in payloads
             )
-            if response.function_code != WriteMultipleCoilsResponse.function_code:
-                raise ModbusResponseError(response)
+        )
+        for response in responses:
+            _check_response(response, "write_coils")
 
     async def write_coil(
-        self, var: str, value: ValueType, unit: KeyType = DEFAULT_SLAVE
+        self,
+        var: str,
+        value: ValueType,
+        unit: KeyType = DEFAULT_SLAVE,
+        nowait: bool = False,
     ) -> None:
         """Set ``var`` in coil memory to ``value``
 
@@ -247,6 +378,9 @@ class Protocol:
             var: The variable to modify
             value: The new value of ``var``
             unit: The unit to write to
+            nowait:
+                Return without waiting for the response of the server
+                (see ``drain`` for details)
 
         Raises:
             ModbusResponseError: If reading the slave failed
@@ -255,7 +389,12 @@ class Protocol:
             MissingSubLayoutError:
                 If there is no memory layout defined for coils
         """
-        await self.write_coils({var: value}, unit)
+        if nowait:
+            slave_layout = self._get_layout(unit, "coils")
+            payload = slave_layout.build_payload({var: value})
+            await self._schedule(self._write_coil_chunks(payload, unit))
+        else:
+            await self.write_coils({var: value}, unit)
 
     async def read_coils(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
@@ -281,12 +420,14 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's coil layout's range.
         """
-        slave_layout = self._layout.get_coil_layout(unit)
-        response = await self._protocol.read_coils(
-            slave_layout.address, slave_layout.size, unit=unit
+        slave_layout = self._get_layout(unit, "coils")
+        response = await self._limit(
+            self._protocol.read_coils,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
         )
-        if response.function_code != ReadCoilsResponse.function_code:
-            raise ModbusResponseError(response)
+        _check_response(response, "read_coils")
         return slave_layout.decode_coils(response.bits, variables)
 
     async def read_coil(self, var: str, unit: KeyType = DEFAULT_SLAVE) -> list[bool]:
@@ -308,7 +449,7 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's coil layout's range.
         """
-        d = await self.read_coils(unit=unit)
+        d = await self.read_coils((var,), unit=unit)
         return d[var]
 
     async def read_discrete_inputs(
@@ -335,12 +476,14 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's discrete input layout's range.
         """
-        slave_layout = self._layout.get_discrete_input_layout(unit)
-        response = await self._protocol.read_discrete_inputs(
-            slave_layout.address, slave_layout.size, unit=unit
+        slave_layout = self._get_layout(unit, "discrete_inputs")
+        response = await self._limit(
+            self._protocol.read_discrete_inputs,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
         )
-        if response.function_code != ReadDiscreteInputsResponse.function_code:
-            raise ModbusResponseError(response)
+        _check_response(response, "read_discrete_inputs")
         return slave_layout.decode_coils(response.bits, variables)
 
     async def read_discrete_input(
@@ -365,14 +508,317 @@ class Protocol:
         Note that this method will always execute a complete readout of
         the slave's discrete input layout's range.
         """
-        d = await self.read_discrete_inputs(unit=unit)
+        d = await self.read_discrete_inputs((variable,), unit=unit)
         return d[variable]
 
+    async def read_input_registers_raw(
+        self, unit: KeyType = DEFAULT_SLAVE
+    ) -> tuple[int, list[int]]:
+        """Read the input registers of ``unit`` without decoding them.
+
+        Args:
+            unit: The unit to read from
+
+        Returns:
+            A tuple ``(address, registers)``, where ``address`` is the
+            start address of the input registers layout of ``unit`` and
+            ``registers`` are the raw values read from the slave
+
+        Raises:
+            ModbusResponseError: If reading the slave failed
+            MissingSubLayoutError:
+                If there is no memory layout defined for input registers
+
+        Use this to skip decoding if you need the raw memory.
+        """
+        slave_layout = self._get_layout(unit, "input_registers")
+        response = await self._limit(
+            self._protocol.read_input_registers,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
+        )
+        _check_response(response, "read_input_registers")
+        return slave_layout.address, response.registers
+
+    async def read_holding_registers_raw(
+        self, unit: KeyType = DEFAULT_SLAVE
+    ) -> tuple[int, list[int]]:
+        """Read the holding registers of ``unit`` without decoding them.
+
+        Args:
+            unit: The unit to read from
+
+        Returns:
+            A tuple ``(address, registers)``, where ``address`` is the
+            start address of the holding registers layout of ``unit``
+            and ``registers`` are the raw values read from the slave
+
+        Raises:
+            ModbusResponseError: If reading the slave failed
+            MissingSubLayoutError:
+                If there is no memory layout defined for holding registers
+
+        Use this to skip decoding if you need the raw memory.
+        """
+        slave_layout = self._get_layout(unit, "holding_registers")
+        response = await self._limit(
+            self._protocol.read_holding_registers,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
+        )
+        _check_response(response, "read_holding_registers")
+        return slave_layout.address, response.registers
+
+    async def read_coils_raw(
+        self, unit: KeyType = DEFAULT_SLAVE
+    ) -> tuple[int, list[bool]]:
+        """Read the coils of ``unit`` without decoding them.
+
+        Args:
+            unit: The unit to read from
+
+        Returns:
+            A tuple ``(address, bits)``, where ``address`` is the start
+            address of the coils layout of ``unit`` and ``bits`` are the
+            raw values read from the slave
+
+        Raises:
+            ModbusResponseError: If reading the slave failed
+            MissingSubLayoutError:
+                If there is no memory layout defined for coils
+
+        Use this to skip decoding if you need the raw memory.
+        """
+        slave_layout = self._get_layout(unit, "coils")
+        response = await self._limit(
+            self._protocol.read_coils,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
+        )
+        _check_response(response, "read_coils")
+        # Responses are padded to full bytes.
+        return slave_layout.address, response.bits[: slave_layout.size]
+
+    async def read_discrete_inputs_raw(
+        self, unit: KeyType = DEFAULT_SLAVE
+    ) -> tuple[int, list[bool]]:
+        """Read the discrete inputs of ``unit`` without decoding them.
+
+        Args:
+            unit: The unit to read from
+
+        Returns:
+            A tuple ``(address, bits)``, where ``address`` is the start
+            address of the discrete inputs layout of ``unit`` and
+            ``bits`` are the raw values read from the slave
+
+        Raises:
+            ModbusResponseError: If reading the slave failed
+            MissingSubLayoutError:
+                If there is no memory layout defined for discrete inputs
+
+        Use this to skip decoding if you need the raw memory.
+        """
+        slave_layout = self._get_layout(unit, "discrete_inputs")
+        response = await self._limit(
+            self._protocol.read_discrete_inputs,
+            slave_layout.address,
+            slave_layout.size,
+            unit=unit,
+        )
+        _check_response(response, "read_discrete_inputs")
+        # Responses are padded to full bytes.
+        return slave_layout.address, response.bits[: slave_layout.size]
+
+    async def drain(self) -> None:
+        """Wait until all writes issued with ``nowait=True`` are done.
+
+        Raises:
+            PendingWriteError:
+                If one of the pending writes failed since the last call
+                and no ``error_callback`` was specified; the ``errors``
+                attribute holds all errors in order of occurrence
+
+        Call this before shutting down the client to make sure that no
+        write is lost.
+        """
+        if self._pending_writes:
+            await asyncio.wait(self._pending_writes)
+        if self._write_errors:
+            errors = self._write_errors
+            self._write_errors = []
+            raise PendingWriteError(errors) from errors[0]
+
+    async def read_input_registers_many(
+        self, units: Iterable[KeyType], variables: Optional[Iterable[str]] = None
+    ) -> dict[KeyType, dict[str, ValueType]]:
+        """Read ``variables`` from the input registers of each of
+        ``units``.
+
+        Args:
+            units: The units to read from
+            variables: The variables to read (all by default)
+
+        Returns:
+            A ``dict`` mapping each unit to a ``dict`` which maps the
+            queried variable's names to their values
+
+        Raises:
+            See ``read_input_registers``.
+
+        The requests are sent concurrently, so reading from ``n`` units
+        only takes about as long as a single round-trip.
+        """
+        return await self._gather(self.read_input_registers, units, variables)
+
+    async def read_holding_registers_many(
+        self, units: Iterable[KeyType], variables: Optional[Iterable[str]] = None
+    ) -> dict[KeyType, dict[str, ValueType]]:
+        """Read ``variables`` from the holding registers of each of
+        ``units``.
+
+        Args:
+            units: The units to read from
+            variables: The variables to read (all by default)
+
+        Returns:
+            A ``dict`` mapping each unit to a ``dict`` which maps the
+            queried variable's names to their values
+
+        Raises:
+            See ``read_holding_registers``.
+
+        The requests are sent concurrently, so reading from ``n`` units
+        only takes about as long as a single round-trip.
+        """
+        return await self._gather(self.read_holding_registers, units, variables)
+
+    async def read_coils_many(
+        self, units: Iterable[KeyType], variables: Optional[Iterable[str]] = None
+    ) -> dict[KeyType, dict[str, ValueType]]:
+        """Read ``variables`` from the coils of each of ``units``.
+
+        Args:
+            units: The units to read from
+            variables: The variables to read (all by default)
+
+        Returns:
+            A ``dict`` mapping each unit to a ``dict`` which maps the
+            queried variable's names to their values
+
+        Raises:
+            See ``read_coils``.
+
+        The requests are sent concurrently, so reading from ``n`` units
+        only takes about as long as a single round-trip.
+        """
+        return await self._gather(self.read_coils, units, variables)
+
+    async def read_discrete_inputs_many(
+        self, units: Iterable[KeyType], variables: Optional[Iterable[str]] = None
+    ) -> dict[KeyType, dict[str, ValueType]]:
+        """Read ``variables`` from the discrete inputs of each of
+        ``units``.
+
+        Args:
+            units: The units to read from
+            variables: The variables to read (all by default)
+
+        Returns:
+            A ``dict`` mapping each unit to a ``dict`` which maps the
+            queried variable's names to their values
+
+        Raises:
+            See ``read_discrete_inputs``.
+
+        The requests are sent concurrently, so reading from ``n`` units
+        only takes about as long as a single round-trip.
+        """
+        return await self._gather(self.read_discrete_inputs, units, variables)
+
+    def _get_layout(
+        self, unit: KeyType, type_: str
+    ) -> Union[registers.RegisterLayout, coils.CoilLayout]:
+        """Return the memory layout of type ``type_`` of ``unit``.
+
+        Raises:
+            NoSuchSlaveLayoutError: If there is no layout for ``unit``
+            MissingSubLayoutError:
+                If there is no memory layout of type ``type_``
+        """
+        return _LAYOUT_GETTERS[type_](self._layout, unit)
+
+    async def _schedule(self, coro: Awaitable) -> None:
+        """Run ``coro`` as background task, respecting the
+        ``max_inflight`` limit."""
+        if self._max_inflight is not None:
+            while len(self._pending_writes) >= self._max_inflight:
+                await asyncio.wait(
+                    self._pending_writes, return_when=asyncio.FIRST_COMPLETED
+                )
+        task = asyncio.create_task(coro)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    def _on_write_done(self, task: asyncio.Task) -> None:
+        self._pending_writes.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            return
+        if self._error_callback is None:
+            self._write_errors.append(error)
+        else:
+            self._error_callback(error)
+
+    async def _limit(self, request: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Send ``request(*args, **kwargs)`` and await the response
+        while respecting the ``max_inflight`` limit."""
+        if self._max_inflight is None:
+            return await request(*args, **kwargs)
+        # Create the semaphore lazily so that it's bound to the running loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_inflight)
+        async with self._semaphore:
+            return await request(*args, **kwargs)
+
+    async def _gather(
+        self,
+        read: Callable,
+        units: Iterable[KeyType],
+        variables: Optional[Iterable[str]],
+    ) -> dict[KeyType, dict[str, ValueType]]:
+        units = list(units)
+        results = await asyncio.gather(*(read(variables, unit=u) for u in units))
+        return dict(zip(units, results))
+
     @property
     def protocol(self) -> pymodbus.client.asynchronous.async_io.ModbusClientProtocol:
         return self._protocol
 
 
+def install_fast_loop() -> bool:
+    """Use the ``uvloop`` event loop policy, if available.
+
+    Returns:
+        ``True`` if ``uvloop`` was installed, ``False`` otherwise
+
+    Call this before creating the event loop which the pymodbus client
+    is run on. If ``uvloop`` is not installed, the default event loop
+    policy is left untouched.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 class Server:
     def __init__(self, server) -> None:
         """Wraps a ``pymodbus`` server.
@@ -403,6 +849,8 @@ class Client:
         loop,
         client: ModbusClient,
         layout: ServerContextLayout,
+        max_inflight: Optional[int] = None,
+        error_callback: Optional[Callable[[Exception], None]] = None,
     ) -> None:
         """Stores a modbus client and the layouted protocol.
 
@@ -410,16 +858,43 @@ class Client:
             loop: The ``asyncio`` event loop that ``client`` runs on
             client: The modbus client to store
             layout: The layout of the datastore that the client operates on
+            max_inflight: See ``Protocol``
+            error_callback: See ``Protocol``
 
         This is purely a utility class which keeps the event loop and
         the client object safe from garbage collection while allowing
         access to the protocol (plus layout) for writing and reading.
         """
-        assert client.protocol
-        self._loop = loop  # pymodbus doesn't save this loop, so we must protect it from garbage collection!
+        if not client.protocol:
+            raise NotConnectedError("Client has no protocol; is it connected?")
+        # The asyncio clients of pymodbus keep a reference to their loop
+        # (``client.loop``). If that's not the case, we must protect the
+        # loop from garbage collection ourselves.
+        if getattr(client, "loop", None) is not loop:
+            self._loop = loop
         self._client = client
-        self._protocol = Protocol(client.protocol, layout)
+        _disable_nagle(client.protocol.transport)
+        self._protocol = Protocol(
+            client.protocol,
+            layout,
+            max_inflight=max_inflight,
+            error_callback=error_callback,
+        )
 
     @property
     def protocol(self) -> Protocol:
         return self._protocol
+
+
+def _disable_nagle(transport: Optional[asyncio.BaseTransport]) -> None:
+    """Disable Nagle's algorithm on the socket of ``transport``.
+
+    Modbus requests and responses are tiny, so we want them flushed
+    immediately. Transports without TCP socket (serial, UDP) are ignored.
+    """
+    if transport is None:
+        return
+    sock = transport.get_extra_info("socket")
+    if sock is None or sock.type != socket.SOCK_STREAM:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
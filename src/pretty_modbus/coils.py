@@ -6,8 +6,7 @@ from __future__ import annotations
 
 import collections
 import dataclasses
-import itertools
-from typing import Union, List
+from typing import Union, List, Tuple
 
 from pretty_modbus.exceptions import (
     ModbusBackendException,
@@ -17,9 +16,12 @@ from pretty_modbus.exceptions import (
     DuplicateVariableError,
     NegativeAddressError,
 )
+from pretty_modbus.layout import _PlanCache
 
 
 class InvalidSizeError(ModbusBackendException):
+    __slots__ = ("name", "size")
+
     def __init__(self, name: str, size: int, msg: Optional[int] = None) -> None:
         if msg is None:
             msg = f"Variable '{name}' has invalid size {size}. Coil size must always be positive."
@@ -29,6 +31,8 @@ class InvalidSizeError(ModbusBackendException):
 
 
 class Variable:
+    __slots__ = ("_name", "_size", "address")
+
     def __init__(self, name: str, size: int = 1, address: Optional[int] = None) -> None:
         """
         Args:
@@ -52,11 +56,13 @@ class Variable:
         self.address = address
 
     def __eq__(self, other: Variable) -> bool:
-        return (
-            self._name == other._name
-            and self._size == other._size
-            and self.address == other.address
-        )
+        if not isinstance(other, Variable):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def _key(self) -> tuple:
+        """Return a tuple which identifies the variable for comparisons."""
+        return (self._name, self._size, self.address)
 
     @property
     def name(self) -> str:
@@ -83,6 +89,10 @@ class Variable:
 class Chunk:
     address: int
     values: ValueType
+    # See ``registers.Chunk``.
+    boundaries: Tuple[int, ...] = dataclasses.field(
+        default=(), compare=False, repr=False
+    )
 
 
 class CoilLayout:
@@ -103,7 +113,7 @@ class CoilLayout:
         address is ``None``, it is aligned with the previous variable,
         i.e. its address is set equal to the end of the previous variable.
         """
-        self._variables = variables
+        self._variables = tuple(variables)
 
         # Raise on duplicate!
         names = [v.name for v in self._variables]
@@ -112,6 +122,7 @@ class CoilLayout:
         ]
         if duplicates:
             raise DuplicateVariableError(duplicates[0])
+        self._names = frozenset(names)
 
         if not variables:
             raise NoVariablesError("Layout contains no variables")
@@ -122,24 +133,38 @@ class CoilLayout:
                 current.align_with(last)
             elif current.address < last.end:
                 raise InvalidAddressLayoutError(current, last)
+        # See ``RegisterLayout``.
+        self._signature = tuple(v._key() for v in self._variables)
+        # Offsets of the variables relative to the start of the layout,
+        # so that decoding doesn't have to recompute them.
+        start = self.address
+        self._decode_table = tuple(
+            (v.name, v.address - start, v.end - start) for v in self._variables
+        )
+        self._plan_cache = _PlanCache(self._variables)
 
     @classmethod
     def load(cls, variables) -> CoilLayout:
         return CoilLayout([Variable(**v) for v in variables])
 
     def __eq__(self, other: CoilLayout) -> bool:
-        return self._variables == other._variables
+        if not isinstance(other, CoilLayout):
+            return NotImplemented
+        return self._signature == other._signature
+
+    def __hash__(self) -> int:
+        return hash(self._signature)
 
     def __contains__(self, var: str) -> bool:
-        hit = next((v for v in self._variables if v.name == var), None)
-        return hit is not None
+        return var in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the layout's variables."""
+        return (v.name for v in self._variables)
 
     def __repr__(self) -> str:
-        return str(self._variables)
+        return str(list(self._variables))
 
-    # FIXME This has a healthy amount of code duplication with the
-    # register layout's analogous function. Maybe use an abstraction for
-    # chunking the memory?
     def build_payload(self, values: dict[str, ValueType]) -> list[Chunk]:
         """Build data for writing new values to memory.
 
@@ -165,44 +190,30 @@ class CoilLayout:
         fragmented ``values`` parameter will result in more items in the
         list, and, thus, a larger amount of IO operations.
         """
-        result = []
-        address = self._variables[0].address
-        bits = []
+        names = frozenset(k for k, v in values.items() if v is not None)
+        # Raise if a variable was not found. Check before planning, so
+        # that invalid names never make it into the plan cache.
+        if len(names) < len(values) or not names <= self._names:
+            raise VariableNotFoundError(set(values.keys()) - (names & self._names))
+        plan = self._plan_cache.get(names)
 
-        def build_chunk():
-            nonlocal bits
-            if bits:
-                result.append(Chunk(address, bits))
+        result = []
+        for address, variables, boundaries in plan:
             bits = []
-
-        seen = set()
-        for var, next_ in itertools.zip_longest(
-            self._variables, self._variables[1:], fillvalue=None
-        ):
-            value = values.get(var.name, None)
-            if value is None:
-                build_chunk()
-                if next_ is not None:
-                    address = next_.address
-                continue
-            if isinstance(value, list):
-                bits.extend(value)
-            else:  # Assuming int/bool/...
-                bits.append(bool(value))
-            if next_ is None:
-                build_chunk()
-            elif not next_.succeeds(var):
-                build_chunk()
-                address = next_.address
-            seen.add(var.name)
-
-        if len(seen) < len(values):
-            not_found = set(values.keys()) - seen
-            raise VariableNotFoundError(not_found)
+            for var in variables:
+                value = values[var.name]
+                if isinstance(value, list):
+                    bits.extend(value)
+                else:  # Assuming int/bool/...
+                    bits.append(bool(value))
+            result.append(Chunk(address, bits, boundaries))
         return result
 
     def decode_coils(
-        self, coils: list[str], variables_to_decode: Optional[Iterable[str]] = None
+        self,
+        coils: list[str],
+        variables_to_decode: Optional[Iterable[str]] = None,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, ValueType]:
         """Decode coils into Python types.
 
@@ -210,6 +221,9 @@ class CoilLayout:
             coils: The coils to decode
             variables_to_decode:
                 The names of the variables that occur in ``coils``
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one
 
         The first element of ``coils`` must be the coil with address
         equal to ``self.address`. Don't just read _all_ coils and pass
@@ -223,19 +237,27 @@ class CoilLayout:
                 If ``variables_to_decode`` contains an items which does
                 not match any variable of the layout
         """
+        if out is None:
+            result = {}
+        else:
+            result = out
+            result.clear()
         if variables_to_decode is None:
-            variables_to_decode = [x.name for x in self._variables]
-        result = {}
+            # Fast path: Decode everything, no need for filtering.
+            for name, lo, hi in self._decode_table:
+                # Unpack single bit sequence!
+                result[name] = coils[lo] if hi - lo == 1 else coils[lo:hi]
+            return result
+
+        if not isinstance(variables_to_decode, (set, frozenset)):
+            variables_to_decode = frozenset(variables_to_decode)
+
         seen = set()
-        for var in self._variables:
-            if var.name not in variables_to_decode:
+        for name, lo, hi in self._decode_table:
+            if name not in variables_to_decode:
                 continue
-            value = coils[var.address - self.address : var.end - self.address]
-            # Unpack single bit sequence!
-            if len(value) == 1:
-                value = value[0]
-            result[var.name] = value
-            seen.add(var.name)
+            result[name] = coils[lo] if hi - lo == 1 else coils[lo:hi]
+            seen.add(name)
 
         if len(seen) < len(variables_to_decode):
             not_found = set(variables_to_decode) - seen
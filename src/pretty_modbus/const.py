@@ -3,3 +3,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 DEFAULT_SLAVE = 0
+
+# Maximum amount of registers/coils which may be written using a single
+# "Write Multiple Registers"/"Write Multiple Coils" request (see Modbus
+# Application Protocol Specification V1.1b3, 6.11 and 6.12).
+MAX_WRITE_REGISTERS = 123
+MAX_WRITE_COILS = 1968
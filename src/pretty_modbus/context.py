@@ -4,6 +4,8 @@
 
 from __future__ import annotations
 
+import threading
+
 import pymodbus.datastore
 import pymodbus.exceptions
 
@@ -12,7 +14,20 @@ from pretty_modbus.const import DEFAULT_SLAVE
 from pretty_modbus.exceptions import NoSuchSlaveError
 
 
+# Maps memory types to the layout getter and the pymodbus datastore key.
+_SPEC = {
+    "input_registers": (ServerContextLayout.get_input_register_layout, "i"),
+    "holding_registers": (ServerContextLayout.get_holding_register_layout, "h"),
+    "coils": (ServerContextLayout.get_coil_layout, "c"),
+    "discrete_inputs": (ServerContextLayout.get_discrete_input_layout, "d"),
+}
+_REGISTER_STORES = frozenset({"i", "h"})
+
+
 class ServerContext:
+    # Daemon jobs access the context on every period.
+    __slots__ = ("_context", "_layout", "_lock")
+
     def __init__(
         self,
         context: pymodbus.datastore.context.ModbusServerContext,
@@ -28,6 +43,7 @@ class ServerContext:
         """
         self._context = context
         self._layout = layout
+        self._lock = threading.RLock()
 
     def _get_store(self, unit: Key, item: str) -> ModbusDatastore:
         """Get a datastore from slave.
@@ -42,327 +58,220 @@ class ServerContext:
             NoSuchSlaveError:
                 If ``unit`` is not an item of the context
         """
+        # Look up the slave on every call, as it may be replaced with
+        # ``context[unit] = slave``.
         try:
             return self._context[unit].store[item]
         except pymodbus.exceptions.NoSuchSlaveException as e:
             raise NoSuchSlaveError from e
 
+    def _get(
+        self, type_: str, variables: Optional[Iterable[str]], unit: KeyType
+    ) -> dict[str, ValueType]:
+        """Read ``variables`` from the memory of type ``type_``."""
+        get_layout, item = _SPEC[type_]
+        slave_layout = get_layout(self._layout, unit)
+        store = self._get_store(unit, item)
+        with self._lock:
+            data = store.getValues(slave_layout.address, slave_layout.size)
+        if item in _REGISTER_STORES:
+            return slave_layout.decode_registers(data, variables)
+        return slave_layout.decode_coils(data, variables)
+
+    def _set(self, type_: str, values: dict[str, ValueType], unit: KeyType) -> None:
+        """Write ``values`` to the memory of type ``type_``."""
+        get_layout, item = _SPEC[type_]
+        slave_layout = get_layout(self._layout, unit)
+        if item in _REGISTER_STORES:
+            # For some reason, pymodbus stores each register as big-endian
+            # integer in memory, so we need to convert.
+            payloads = slave_layout.build_payload(values, as_registers=True)
+        else:
+            payloads = slave_layout.build_payload(values)
+        store = self._get_store(unit, item)
+        with self._lock:
+            for payload in payloads:
+                store.setValues(payload.address, payload.values)
+
     def get_input_registers(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Read ``variables`` from input register of ``unit``.
-
-        Args:
-            variables: The variables to read (all by default)
-            unit: The unit to read from
-
-        Returns:
-            A ``dict`` mapping the queried variable's names to their
-            values
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-
-        Note that this method will always execute a complete readout of
-        the slave's input register layout's range.
-        """
-        slave_layout = self._layout.get_input_register_layout(unit)
-        store = self._get_store(unit, "i")
-        registers = store.getValues(slave_layout.address, slave_layout.size)
-        return slave_layout.decode_registers(registers, variables)
+        return self._get("input_registers", variables, unit)
 
     def set_input_registers(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
     ) -> None:
-        """Write ``values`` to input register of ``unit``.
-
-        Args:
-            values: Dictionary that maps variable to value
-            unit: The unit to write to
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-        """
-        slave_layout = self._layout.get_input_register_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            # For some reason, pymodbus stores each register as big-endian
-            # integer in memory, so we need to convert.
-            self._get_store(unit, "i").setValues(
-                payload.address, [_bytes_to_16bit_int(x) for x in payload.values]
-            )
+        self._set("input_registers", values, unit)
 
     def get_holding_registers(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Read ``variables`` from holding register of ``unit``.
-
-        Args:
-            variables: The variables to read (all by default)
-            unit: The unit to read from
-
-        Returns:
-            A ``dict`` mapping the queried variable's names to their
-            values
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-
-        Note that this method will always execute a complete readout of
-        the slave's holding register layout's range.
-        """
-        slave_layout = self._layout.get_holding_register_layout(unit)
-        store = self._get_store(unit, "h")
-        registers = store.getValues(slave_layout.address, slave_layout.size)
-        return slave_layout.decode_registers(registers, variables)
+        return self._get("holding_registers", variables, unit)
 
     def set_holding_registers(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
     ) -> None:
-        """Write ``values`` to holding register of ``unit``.
-
-        Args:
-            values: Dictionary that maps variable to value
-            unit: The unit to write to
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-        """
-        slave_layout = self._layout.get_holding_register_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        # For some reason, pymodbus stores each register as big-endian
-        # integer in memory, so we need to convert.
-        for payload in payloads:
-            self._get_store(unit, "h").setValues(
-                payload.address, [_bytes_to_16bit_int(x) for x in payload.values]
-            )
+        self._set("holding_registers", values, unit)
 
     def get_coils(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Read ``variables`` from coils of ``unit``.
-
-        Args:
-            variables: The variables to read (all by default)
-            unit: The unit to read from
-
-        Returns:
-            A ``dict`` mapping the queried variable's names to their
-            values
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-
-        Note that this method will always execute a complete readout of
-        the slave's coil layout's range.
-        """
-        slave_layout = self._layout.get_coil_layout(unit)
-        store = self._get_store(unit, "c")
-        coils = store.getValues(slave_layout.address, slave_layout.size)
-        return slave_layout.decode_coils(coils, variables)
+        return self._get("coils", variables, unit)
 
     def set_coils(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
     ) -> None:
-        """Write ``values`` to coils of ``unit``.
-
-        Args:
-            values: Dictionary that maps variable to value
-            unit: The unit to write to
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-        """
-        slave_layout = self._layout.get_coil_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            self._get_store(unit, "c").setValues(payload.address, payload.values)
+        self._set("coils", values, unit)
 
     def get_discrete_inputs(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Read ``variables`` from discrete inputs of ``unit``.
-
-        Args:
-            variables: The variables to read (all by default)
-            unit: The unit to read from
-
-        Returns:
-            A ``dict`` mapping the queried variable's names to their
-            values
-
-        Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
-
-        Note that this method will always execute a complete readout of
-        the slave's discrete input layout's range.
-        """
-        slave_layout = self._layout.get_discrete_input_layout(unit)
-        store = self._get_store(unit, "d")
-        coils = store.getValues(slave_layout.address, slave_layout.size)
-        return slave_layout.decode_coils(coils, variables)
+        return self._get("discrete_inputs", variables, unit)
 
     def set_discrete_inputs(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
     ) -> None:
-        """Write ``values`` to discrete inputs of ``unit``.
+        self._set("discrete_inputs", values, unit)
+
+    def transact(
+        self,
+        read: Iterable[str] = (),
+        write: Optional[
+            Union[dict[str, dict[str, ValueType]], Callable[[dict], dict]]
+        ] = None,
+        unit: KeyType = DEFAULT_SLAVE,
+    ) -> dict[str, dict[str, ValueType]]:
+        """Read and write the memory of ``unit`` in one transaction.
 
         Args:
-            values: Dictionary that maps variable to value
-            unit: The unit to write to
+            read:
+                The memory to read (``"input_registers"``,
+                ``"holding_registers"``, ``"coils"`` and/or
+                ``"discrete_inputs"``)
+            write:
+                A ``dict`` mapping memory types to the values to write,
+                or a callable which receives the values read and returns
+                such a ``dict``
+            unit: The unit to read from and write to
+
+        Returns:
+            A ``dict`` mapping the items of ``read`` to the values read
+            (all variables of the respective layout)
 
         Raises:
-            VariableNotFound:
-                If one or more items of ``variables`` are not mapped
-                by the input register layout of ``unit``
-            MissingLayoutError:
-                If there is not slave layout defined for ``unit``
-            MissingSubLayoutError:
-                If there is no memory layout defined for input registers
-            NoSuchSlaveError:
-                If ``unit`` is not an item of the context
+            See ``get_*`` and ``set_*``.
+
+        The reads are executed before the writes. The transaction is
+        atomic with respect to all other reads and writes through the
+        same ``ServerContext``. Note that this does _not_ exclude access
+        from the pymodbus server, which doesn't lock the datastore.
         """
-        slave_layout = self._layout.get_discrete_input_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            self._get_store(unit, "d").setValues(payload.address, payload.values)
+        with self._lock:
+            result = {type_: getattr(self, "get_" + type_)(unit=unit) for type_ in read}
+            if callable(write):
+                write = write(result)
+            for type_, values in (write or {}).items():
+                getattr(self, "set_" + type_)(values, unit=unit)
+        return result
 
     async def get_input_registers_coro(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Coroutine version of ``get_input_registers`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
         return self.get_input_registers(variables, unit)
 
-    async def set_input_registers_coro(self, values: dict[str, ValueType]) -> None:
-        """Coroutine version of ``set_input_registers`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
-        self.set_input_registers(values)
+    async def set_input_registers_coro(
+        self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        self.set_input_registers(values, unit)
 
     async def get_holding_registers_coro(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Coroutine version of ``get_holding_registers`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
         return self.get_holding_registers(variables, unit)
 
-    async def set_holding_registers_coro(self, values: dict[str, ValueType]) -> None:
-        """Coroutine version of ``set_holding_registers`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
-        self.set_holding_registers(values)
-
-    async def get_discrete_inputs_coro(
-        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
-    ) -> dict[str, ValueType]:
-        """Coroutine version of ``get_discrete_inputs`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
-        return self.get_discrete_inputs(variables, unit)
-
-    async def set_discrete_inputs_coro(self, values: dict[str, ValueType]) -> None:
-        """Coroutine version of ``set_discrete_inputs`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
-        self.set_discrete_inputs(values)
+    async def set_holding_registers_coro(
+        self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        self.set_holding_registers(values, unit)
 
     async def get_coils_coro(
         self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
     ) -> dict[str, ValueType]:
-        """Coroutine version of ``get_coils`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
         return self.get_coils(variables, unit)
 
-    async def set_coils_coro(self, values: dict[str, ValueType]) -> None:
-        """Coroutine version of ``set_coils`` for convenience.
-
-        Use this coroutine to prevent race conditions between server and
-        client access to the underlying datastore.
-        """
-        self.set_coils(values)
-
-
-def _bytes_to_16bit_int(b: bytes) -> int:
-    """Convert two bytes to integer.
+    async def set_coils_coro(
+        self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        self.set_coils(values, unit)
 
-    Args:
-        b: Sequence of bytes of length at least 2
+    async def get_discrete_inputs_coro(
+        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
+    ) -> dict[str, ValueType]:
+        return self.get_discrete_inputs(variables, unit)
 
-    Wordorder and byteorder are big-endian.
-    """
-    assert len(b) > 1
-    return 256 * b[0] + b[1]
+    async def set_discrete_inputs_coro(
+        self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        self.set_discrete_inputs(values, unit)
+
+
+_GET_DOC = """Read ``variables`` from {kind} of ``unit``.
+
+Args:
+    variables: The variables to read (all by default)
+    unit: The unit to read from
+
+Returns:
+    A ``dict`` mapping the queried variable's names to their values
+
+Raises:
+    VariableNotFound:
+        If one or more items of ``variables`` are not mapped by the
+        {kind} layout of ``unit``
+    NoSuchSlaveLayoutError:
+        If there is no slave layout defined for ``unit``
+    MissingSubLayoutError:
+        If there is no memory layout defined for {kind}
+    NoSuchSlaveError:
+        If ``unit`` is not an item of the context
+
+Note that this method will always execute a complete readout of the
+slave's {kind} layout's range.
+"""
+
+_SET_DOC = """Write ``values`` to {kind} of ``unit``.
+
+Args:
+    values: Dictionary that maps variable to value
+    unit: The unit to write to
+
+Raises:
+    VariableNotFound:
+        If one or more items of ``values`` are not mapped by the {kind}
+        layout of ``unit``
+    NoSuchSlaveLayoutError:
+        If there is no slave layout defined for ``unit``
+    MissingSubLayoutError:
+        If there is no memory layout defined for {kind}
+    NoSuchSlaveError:
+        If ``unit`` is not an item of the context
+"""
+
+_CORO_DOC = """Coroutine version of ``{name}`` for convenience.
+
+The operation is executed when the coroutine is awaited and doesn't
+yield to the event loop.
+"""
+
+# The getters and setters only differ by memory type, so their
+# docstrings are generated from the templates above.
+for _type, _kind in [
+    ("input_registers", "input registers"),
+    ("holding_registers", "holding registers"),
+    ("coils", "coils"),
+    ("discrete_inputs", "discrete inputs"),
+]:
+    for _name, _doc in [("get_" + _type, _GET_DOC), ("set_" + _type, _SET_DOC)]:
+        getattr(ServerContext, _name).__doc__ = _doc.format(kind=_kind)
+        getattr(ServerContext, _name + "_coro").__doc__ = _CORO_DOC.format(name=_name)
+del _type, _kind, _name, _doc
@@ -6,18 +6,32 @@ from __future__ import annotations
 
 
 class ModbusBackendException(Exception):
-    pass
+    # Subclasses store their attributes in slots, which saves allocating
+    # the instance ``__dict__``.
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Slots are not pickled by ``BaseException.__reduce__``.
+        state = {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if hasattr(self, name)
+        }
+        return type(self), self.args, state or None
 
 
 class NoVariablesError(ModbusBackendException):
-    pass
+    __slots__ = ()
 
 
 class NotConnectedError(ModbusBackendException):
-    pass
+    __slots__ = ()
 
 
 class NegativePeriodError(ModbusBackendException):
+    __slots__ = ("period",)
+
     def __init__(self, period: float, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Expected non-negative period, received: {period}"
@@ -26,6 +40,8 @@ class NegativePeriodError(ModbusBackendException):
 
 
 class UnknownTypeError(ModbusBackendException):
+    __slots__ = ("type",)
+
     def __init__(self, type: str, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Unknown type: {type}"
@@ -34,6 +50,8 @@ class UnknownTypeError(ModbusBackendException):
 
 
 class OutOfBoundsError(ModbusBackendException):
+    __slots__ = ("type", "value")
+
     def __init__(self, type: str, value, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Value {value} is out of bounds for type {type}"
@@ -43,6 +61,8 @@ class OutOfBoundsError(ModbusBackendException):
 
 
 class NegativeAddressError(ModbusBackendException):
+    __slots__ = ("name", "address")
+
     def __init__(self, name: str, address: int, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Variable '{name}' has negative address {address}. Memory address must always be positive."
@@ -52,6 +72,8 @@ class NegativeAddressError(ModbusBackendException):
 
 
 class InvalidAddressLayoutError(ModbusBackendException):
+    __slots__ = ("previous", "current")
+
     def __init__(
         self, current: Variable, previous: Variable, msg: Optional[str] = None
     ) -> None:
@@ -63,6 +85,8 @@ class InvalidAddressLayoutError(ModbusBackendException):
 
 
 class VariableNotFoundError(ModbusBackendException):
+    __slots__ = ("variables",)
+
     def __init__(self, variables: Iterable[str], msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Variables not found: {variables}"
@@ -71,6 +95,8 @@ class VariableNotFoundError(ModbusBackendException):
 
 
 class DuplicateVariableError(ModbusBackendException):
+    __slots__ = ("duplicate",)
+
     def __init__(self, duplicate: str, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"Duplicate variable name: {duplicate}"
@@ -79,10 +105,12 @@ class DuplicateVariableError(ModbusBackendException):
 
 
 class EncodingError(ModbusBackendException):
-    pass
+    __slots__ = ()
 
 
 class MissingSubLayoutError(ModbusBackendException):
+    __slots__ = ("type",)
+
     def __init__(self, type: str, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"No memory layout defined for: {type}"
@@ -91,6 +119,8 @@ class MissingSubLayoutError(ModbusBackendException):
 
 
 class NoSuchSlaveLayoutError(ModbusBackendException):
+    __slots__ = ("unit",)
+
     def __init__(self, unit, msg: Optional[str] = None) -> None:
         if msg is None:
             msg = f"No memory layout defined for slave '{unit}'"
@@ -100,10 +130,12 @@ class NoSuchSlaveLayoutError(ModbusBackendException):
 
 # For wrapping: pymodbus.exceptions.NoSuchSlaveException
 class NoSuchSlaveError(ModbusBackendException):
-    pass
+    __slots__ = ()
 
 
 class ModbusResponseError(ModbusBackendException):
+    __slots__ = ("response",)
+
     def __init__(
         self, response: pymodbus.pdu.ExceptionResponse, msg: Optional[str] = None
     ) -> None:
@@ -111,3 +143,23 @@ class ModbusResponseError(ModbusBackendException):
             msg = str(response)
         super().__init__(msg)
         self.response = response
+
+
+class PendingWriteError(ModbusBackendException):
+    __slots__ = ("errors",)
+
+    def __init__(self, errors: list[Exception], msg: Optional[str] = None) -> None:
+        if msg is None:
+            msg = f"{len(errors)} pending write(s) failed: {errors}"
+        super().__init__(msg)
+        self.errors = errors
+
+
+class ServerError(ModbusBackendException):
+    __slots__ = ("exitcode",)
+
+    def __init__(self, exitcode: int, msg: Optional[str] = None) -> None:
+        if msg is None:
+            msg = f"Server process failed with exit code {exitcode}"
+        super().__init__(msg)
+        self.exitcode = exitcode
@@ -4,11 +4,14 @@
 
 from __future__ import annotations
 
+import collections
 import dataclasses
+import itertools
 
 from pretty_modbus.exceptions import (
     NoSuchSlaveLayoutError,
     MissingSubLayoutError,
+    UnknownTypeError,
     VariableNotFoundError,
 )
 
@@ -21,17 +24,48 @@ class SlaveContextLayout:
     discrete_inputs: Optional[coils.CoilLayout] = None
 
 
-_TYPES = [
+_TYPES = (
     "input_registers",
     "holding_registers",
     "coils",
     "discrete_inputs",
-]
+)
+_TYPES_SET = frozenset(_TYPES)
 
 
 class ServerContextLayout:
+    """Layout of a server context.
+
+    Args:
+        slaves: The layouts of the slave contexts, indexed by unit
+
+    The slave layouts are resolved once on construction. Neither
+    ``slaves`` nor the ``SlaveContextLayout`` objects it contains may be
+    mutated after being passed in; changes to them are not visible to
+    the ``ServerContextLayout``.
+    """
+
     def __init__(self, slaves: dict[Key, SlaveContextLayout]) -> None:
-        self._slaves = slaves
+        self._slaves = dict(slaves)
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """Resolve the layouts and variables, so that lookups in the hot
+        path of the contexts and clients are a single dict access."""
+        self._by_type: dict[
+            tuple[Key, str], registers.RegisterLayout | coils.CoilLayout
+        ] = {}
+        self._var_index: dict[str, tuple[Key, str]] = {}
+        self._unit_var_index: dict[tuple[Key, str], str] = {}
+        for unit, slave in self._slaves.items():
+            for type_ in _TYPES:
+                layout = getattr(slave, type_)
+                if layout is None:
+                    continue
+                self._by_type[unit, type_] = layout
+                for name in layout:
+                    self._var_index.setdefault(name, (unit, type_))
+                    self._unit_var_index.setdefault((unit, name), type_)
 
     def find(self, var: str) -> tuple[Key, str]:
         """Find the type and the containing unit of ``var``.
@@ -46,14 +80,10 @@ class ServerContextLayout:
             VariableNotFoundError:
                 If there is no layout that contains the variable
         """
-        for unit, _ in self._slaves.items():
-            for type_ in _TYPES:
-                layout = self._get(unit, type_)
-                if layout is None:
-                    continue
-                if var in layout:
-                    return unit, type_
-        raise VariableNotFoundError(var)
+        try:
+            return self._var_index[var]
+        except KeyError:
+            raise VariableNotFoundError(var) from None
 
     def where(self, var: str, unit: Optional[Key] = None) -> str:
         """Return where a variable is stored.
@@ -67,30 +97,32 @@ class ServerContextLayout:
             VariableNotFoundError:
                 If there is no layout that contains the variable
         """
-        for type_ in _TYPES:
-            layout = self._get(unit, type_)
-            if layout is None:
-                continue
-            if var in layout:
-                return type_
-        raise VariableNotFoundError(var)
+        if unit not in self._slaves:
+            raise NoSuchSlaveLayoutError(unit)
+        try:
+            return self._unit_var_index[unit, var]
+        except KeyError:
+            raise VariableNotFoundError(var) from None
 
     def _get(
         self, unit: Key, type: str
-    ) -> Union[registers.RegisterLayout, coils.CoilLayout]:
-        slave = self._slaves.get(unit)
-        if slave is None:
+    ) -> Optional[registers.RegisterLayout | coils.CoilLayout]:
+        layout = self._by_type.get((unit, type))
+        if layout is None and unit not in self._slaves:
             raise NoSuchSlaveLayoutError(unit)
-        layout = getattr(slave, type, None)
         return layout
 
     def _get_fallible(
         self, unit: Key, type: str
-    ) -> registeres.RegisterLayout | coils.CoilLayout:
-        layout = self._get(unit, type)
-        if layout is None:
-            raise MissingSubLayoutError(unit, type)
-        return layout
+    ) -> registers.RegisterLayout | coils.CoilLayout:
+        try:
+            return self._by_type[unit, type]
+        except KeyError:
+            if unit not in self._slaves:
+                raise NoSuchSlaveLayoutError(unit) from None
+            if type not in _TYPES_SET:
+                raise UnknownTypeError(type) from None
+            raise MissingSubLayoutError(unit, type) from None
 
     def get_holding_register_layout(self, unit: Key) -> registers.RegisterLayout:
         return self._get_fallible(unit, "holding_registers")
@@ -103,3 +135,137 @@ class ServerContextLayout:
 
     def get_discrete_input_layout(self, unit: Key) -> coils.CoilLayout:
         return self._get_fallible(unit, "discrete_inputs")
+
+
+def coalesce_chunks(chunks: Iterable[Chunk], max_size: int) -> list[Chunk]:
+    """Merge back-to-back chunks and split oversized ones.
+
+    Args:
+        chunks: The chunks to coalesce (``registers.Chunk`` or
+            ``coils.Chunk``)
+        max_size:
+            The maximum amount of registers/coils per chunk
+
+    Returns:
+        A list of chunks, sorted by address, none of which is larger
+        than ``max_size``
+
+    Use this to make sure that writing the payload of a layout requires
+    as few requests as possible without exceeding the limits of the
+    Modbus protocol.
+
+    Oversized chunks are only split at the ``boundaries`` of the chunks
+    and between chunks, so that no variable is spread over two requests.
+    Only a single variable (or a chunk without ``boundaries``) which is
+    larger than ``max_size`` is split in between.
+    """
+    merged = []
+    for chunk in sorted(chunks, key=lambda c: c.address):
+        if merged:
+            _, address, values, boundaries = merged[-1]
+            if address + len(values) == chunk.address:
+                boundaries.append(len(values))
+                boundaries.extend(len(values) + b for b in chunk.boundaries)
+                values.extend(chunk.values)
+                continue
+        merged.append(
+            (type(chunk), chunk.address, list(chunk.values), list(chunk.boundaries))
+        )
+    result = []
+    for cls, address, values, boundaries in merged:
+        for start, end in _split(len(values), boundaries, max_size):
+            result.append(
+                cls(
+                    address + start,
+                    values[start:end],
+                    tuple(b - start for b in boundaries if start < b < end),
+                )
+            )
+    return result
+
+
+def _split(
+    size: int, boundaries: list[int], max_size: int
+) -> Iterator[tuple[int, int]]:
+    """Split ``range(size)`` into pieces no larger than ``max_size``,
+    preferably at ``boundaries``.
+
+    Returns:
+        The ``(start, end)`` of each piece
+    """
+    start = end = 0
+    for boundary in itertools.chain(boundaries, (size,)):
+        if boundary - start > max_size:
+            if end > start:
+                yield start, end
+                start = end
+            # A single variable which exceeds ``max_size`` must be split.
+            while boundary - start > max_size:
+                yield start, start + max_size
+                start += max_size
+        end = boundary
+    if end > start:
+        yield start, end
+
+
+class _PlanCache:
+    """Bounded cache of the payload plans of a register or coil layout.
+
+    Args:
+        variables: The variables of the layout, in order of address
+        maxsize: The maximum number of plans to keep
+
+    Plans are keyed by the caller's sets of variable names, so the cache
+    evicts the least recently used plan once it holds ``maxsize`` plans.
+    """
+
+    def __init__(self, variables: Sequence[Variable], maxsize: int = 256) -> None:
+        self._variables = variables
+        self._maxsize = maxsize
+        self._plans: collections.OrderedDict[
+            frozenset[str], list[tuple[int, list[Variable], tuple[int, ...]]]
+        ] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(
+        self, names: frozenset[str]
+    ) -> list[tuple[int, list[Variable], tuple[int, ...]]]:
+        """Return the plan for writing the variables called ``names``.
+
+        Returns:
+            A list of tuples ``(address, variables, boundaries)``, one
+            for each block of memory, where ``address`` is the start of
+            the block, ``variables`` are the variables stored in the
+            block and ``boundaries`` are the offsets of all but the first
+            variable relative to ``address``
+        """
+        try:
+            plan = self._plans[names]
+            self._plans.move_to_end(names)
+        except KeyError:
+            plan = self._plan(names)
+            self._plans[names] = plan
+            if len(self._plans) > self._maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _plan(
+        self, names: frozenset[str]
+    ) -> list[tuple[int, list[Variable], tuple[int, ...]]]:
+        """Group the variables called ``names`` into connected blocks."""
+        plan = []
+        variables = []
+        for var, next_ in itertools.zip_longest(
+            self._variables, self._variables[1:], fillvalue=None
+        ):
+            if var.name not in names:
+                continue
+            variables.append(var)
+            if next_ is None or next_.name not in names or not next_.succeeds(var):
+                address = variables[0].address
+                boundaries = tuple(v.address - address for v in variables[1:])
+                plan.append((address, variables, boundaries))
+                variables = []
+        return plan
@@ -7,15 +7,16 @@
 from __future__ import annotations
 
 import abc
+import array
 import collections
 import dataclasses
-import itertools
+import functools
 import re
 import struct
-from typing import List, Optional
+import sys
+from typing import List, Optional, Tuple, Union
 
 import bitstruct
-import pymodbus.payload
 import pymodbus.utilities
 
 from pretty_modbus.exceptions import (
@@ -28,6 +29,7 @@ from pretty_modbus.exceptions import (
     UnknownTypeError,
     OutOfBoundsError,
 )
+from pretty_modbus.layout import _PlanCache
 
 
 # Can't use enum for this, as pymodbus requires raw ``str`` values!
@@ -71,7 +73,7 @@ class RegisterLayout:
         address is ``None``, it is aligned with the previous variable,
         i.e. its address is set equal to the end of the previous variable.
         """
-        self._variables = variables
+        self._variables = tuple(variables)
         self._byteorder = byteorder
         self._wordorder = wordorder
 
@@ -82,6 +84,7 @@ class RegisterLayout:
         ]
         if duplicates:
             raise DuplicateVariableError(duplicates[0])
+        self._names = frozenset(names)
 
         if not variables:
             raise NoVariablesError("Layout contains no variables")
@@ -92,6 +95,15 @@ class RegisterLayout:
                 current.align_with(last)
             elif current.address < last.end:
                 raise InvalidAddressLayoutError(current, last)
+        # Layouts are fixed after construction, so compute the key for
+        # comparing and hashing only once.
+        self._signature = (
+            tuple(v._key() for v in self._variables),
+            self._byteorder,
+            self._wordorder,
+        )
+        self._decode_plan = self._plan_decode()
+        self._plan_cache = _PlanCache(self._variables)
 
     @classmethod
     def load(cls, variables, byteorder=Endian.little, wordorder=Endian.big) -> cls:
@@ -99,21 +111,30 @@ class RegisterLayout:
         return RegisterLayout(variables, byteorder, wordorder)
 
     def __eq__(self, other: RegisterLayout) -> bool:
-        return (
-            self._variables == other._variables
-            and self._byteorder == other._byteorder
-            and self._wordorder == other._wordorder
-        )
+        if not isinstance(other, RegisterLayout):
+            return NotImplemented
+        return self._signature == other._signature
+
+    def __hash__(self) -> int:
+        return hash(self._signature)
 
     def __contains__(self, var: str) -> bool:
-        hit = next((v for v in self._variables if v.name == var), None)
-        return hit is not None
+        return var in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the layout's variables."""
+        return (v.name for v in self._variables)
 
-    def build_payload(self, values: dict[str, ValueType]) -> list[Chunk]:
+    def build_payload(
+        self, values: dict[str, ValueType], as_registers: bool = False
+    ) -> list[Chunk]:
         """Build data for writing new values to register.
 
         Args:
             values: A dict mapping variable names to their new value
+            as_registers:
+                Return the registers as big-endian integers (as stored
+                in pymodbus datastores) instead of double-bytes
 
         Returns:
             A list of ``Chunk`` objects, one for each block of bytes to
@@ -134,44 +155,30 @@ class RegisterLayout:
         fragmented ``values`` parameter will result in more items in the
         list, and, thus, a larger amount of IO operations.
         """
+        names = frozenset(k for k, v in values.items() if v is not None)
+        # Raise if a variable was not found. Check before planning, so
+        # that invalid names never make it into the plan cache.
+        if len(names) < len(values) or not names <= self._names:
+            raise VariableNotFoundError(set(values.keys()) - (names & self._names))
+        plan = self._plan_cache.get(names)
+
         result: list[Chunk] = []
         builder = _PayloadBuilder(byteorder=self._byteorder, wordorder=self._wordorder)
-        chunk = self._variables[0].address  # Begin of current chunk
-
-        def build_chunk():
-            payload = builder.build()
-            if payload:
-                result.append(Chunk(chunk, builder.build()))
-                builder.reset()
-
-        seen = set()  # List of variables comitted to payload.
-        for var, next_ in itertools.zip_longest(
-            self._variables, self._variables[1:], fillvalue=None
-        ):
-            value = values.get(var.name, None)
-            # If we're skipping a variable, we need to finish the chunk.
-            if value is None:
-                build_chunk()
-                if next_ is not None:
-                    chunk = next_.address
-                continue
-            var.encode(builder, value)
-            # Check if chunk must be built!
-            if next_ is None:  # Last chunk must be built
-                build_chunk()
-            elif not next_.succeeds(var):  # If there's a gap, build the chunk!
-                build_chunk()
-                chunk = next_.address
-            seen.add(var.name)
-
-        # Raise if a variable was not found.
-        if len(seen) < len(values):
-            not_found = set(values.keys()) - seen
-            raise VariableNotFoundError(not_found)
+        for address, variables, boundaries in plan:
+            for var in variables:
+                var.encode(builder, values[var.name])
+            if as_registers:
+                result.append(Chunk(address, builder.build_registers(), boundaries))
+            else:
+                result.append(Chunk(address, builder.build(), boundaries))
+            builder.reset()
         return result
 
     def decode_registers(
-        self, registers: list[int], variables_to_decode: Optional[Iterable[str]] = None
+        self,
+        registers: list[int],
+        variables_to_decode: Optional[Iterable[str]] = None,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, ValueType]:
         """Decode registers into Python types.
 
@@ -179,6 +186,9 @@ class RegisterLayout:
             registers: The registers to decode
             variables_to_decode:
                 The names of the variables that occur in ``registers``
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one
 
         Returns:
             A ``dict`` mapping variable names to their value
@@ -194,13 +204,33 @@ class RegisterLayout:
         ``variables_to_decode`` must be used to specify the names of the
         variables which are stored in ``registers``.
         """
-        if variables_to_decode is None:
-            variables_to_decode = [v.name for v in self._variables]
         decoder = _PayloadDecoder.from_registers(
             registers, byteorder=self._byteorder, wordorder=self._wordorder
         )
-        result = {}
+        if out is None:
+            result = {}
+        else:
+            result = out
+            result.clear()
+        if variables_to_decode is None:
+            # Fast path: Decode everything, no need for filtering.
+            for offset, fmt, item in self._decode_plan:
+                if fmt is None:
+                    decoder.skip_bytes(offset - decoder.pointer)
+                    result[item.name] = item.decode(decoder)
+                else:
+                    result.update(
+                        zip(item, decoder.unpack_numbers(_unpacker(fmt), offset))
+                    )
+            return result
+
+        if not isinstance(variables_to_decode, (set, frozenset)):
+            # Hash the names once instead of scanning a sequence for
+            # every variable of the layout.
+            variables_to_decode = frozenset(variables_to_decode)
+
         offset = 2 * self.address
+
         seen = set()
         for var in self._variables:
             if var.name not in variables_to_decode:
@@ -216,6 +246,50 @@ class RegisterLayout:
 
         return result
 
+    def _plan_decode(
+        self,
+    ) -> list[tuple[int, Optional[str], Union[Variable, tuple[str, ...]]]]:
+        """Plan decoding the entire layout.
+
+        Returns:
+            A list of tuples ``(offset, fmt, item)``, where ``offset``
+            is the position in the payload (in bytes). Runs of
+            consecutive numbers are merged into one ``struct`` format
+            string ``fmt`` (in ``wordorder``, gaps are padded) and
+            ``item`` is the tuple of their names. For any other
+            variable, ``fmt`` is ``None`` and ``item`` is the variable
+            itself.
+
+        The plan holds format strings rather than compiled ``Struct``
+        objects, which can't be pickled; the layout must remain
+        picklable so that a ``threaded.Server`` can pass it to its
+        child process.
+        """
+        plan = []
+        fmt = ""
+        names = []
+        start = end = 0
+        for var in self._variables:
+            offset = 2 * (var.address - self.address)
+            code = None
+            if isinstance(var, Number):
+                code = _TYPE_TO_STRUCT.get(var._type)
+            if code is None:
+                if names:
+                    plan.append((start, fmt, tuple(names)))
+                    names = []
+                plan.append((offset, None, var))
+                continue
+            if not names:
+                fmt = self._wordorder
+                start = end = offset
+            fmt += (offset - end) * "x" + code
+            names.append(var.name)
+            end = offset + var.size_in_bytes
+        if names:
+            plan.append((start, fmt, tuple(names)))
+        return plan
+
     @property
     def size(self) -> int:
         """Return the total size of the layout in registers."""
@@ -239,6 +313,8 @@ class Variable(abc.ABC):
     bytes, but the _end_ of the variable will be at address 6.
     """
 
+    __slots__ = ("_name", "address")
+
     def __init__(self, name: str, address: Optional[int] = None) -> None:
         """Args:
             name: The variable's name
@@ -256,7 +332,16 @@ class Variable(abc.ABC):
         self.address = address
 
     def __eq__(self, other):
-        return self._name == other._name and self.address == other.address
+        if not isinstance(other, Variable):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def _key(self) -> tuple:
+        """Return a tuple which identifies the variable for comparisons.
+
+        Subclasses extend the tuple by their own attributes.
+        """
+        return (type(self), self._name, self.address)
 
     @property
     def name(self) -> str:
@@ -302,6 +387,8 @@ class Variable(abc.ABC):
 
 
 class Struct(Variable):
+    __slots__ = ("_fields", "_endianness", "_fmt", "_field_names")
+
     def __init__(
         self,
         name: str,
@@ -325,37 +412,38 @@ class Struct(Variable):
         register (may be queried using ``size_in_registers``).
         """
         super().__init__(name, address)
-        self._fields = fields
+        self._fields = tuple(fields)
         self._endianness = endianness
+        # The fields never change, so the format and field names are
+        # computed only once instead of on every encode/decode.
+        self._fmt = self._format()
+        self._field_names = [field.name for field in fields]
 
     @classmethod
     def load(cls, name, fields, address=None, endianness=Endian.little) -> Struct:
         fields = [Field(**d) for d in fields]
         return Struct(name, fields, address, endianness)
 
-    def __eq__(self, other: Struct) -> None:
-        return (
-            super().__eq__(other)
-            and self._fields == other._fields
-            and self._endianness == other._endianness
-        )
+    def _key(self) -> tuple:
+        fields = tuple((field.name, field.format) for field in self._fields)
+        return super()._key() + (fields, self._endianness)
 
     @property
     def size_in_bytes(self) -> int:
-        return _bitstruct_format_size_in_bytes(self._format())
+        return _bitstruct_format_size_in_bytes(self._fmt)
 
     def decode(self, decoder: _PayloadDecoder) -> dict[str, ValueType]:
-        values = decoder.decode_bitstruct(self._format())
-        return dict(zip([f.name for f in self._fields], values))
+        values = decoder.decode_bitstruct(self._fmt)
+        return dict(zip(self._field_names, values))
 
     def encode(
         self,
         builder: _PayloadBuilder,
         value: dict[str, ValueType],
     ) -> None:
-        values = [value[field.name] for field in self._fields]
+        values = [value[name] for name in self._field_names]
         try:
-            builder.add_bitstruct(self._format(), values)
+            builder.add_bitstruct(self._fmt, values)
         except bitstruct.Error as e:
             EncodingError(f"Variable '{self._name}': " + str(e))
 
@@ -380,6 +468,8 @@ class Field:
     For details on ``format``, see the documentation of ``bitstruct``.
     """
 
+    __slots__ = ("name", "format")
+
     name: str
     format: str
 
@@ -389,6 +479,8 @@ class Field:
 
 
 class Str(Variable):
+    __slots__ = ("_length",)
+
     def __init__(self, name: str, length: int, address: Optional[int] = None) -> None:
         """A variable that is a string.
 
@@ -400,8 +492,8 @@ class Str(Variable):
         super().__init__(name, address)
         self._length = length
 
-    def __eq__(self, other: Str) -> bool:
-        return super().__eq__(other) and self._length == other._length
+    def _key(self) -> tuple:
+        return super()._key() + (self._length,)
 
     def __repr__(self) -> str:
         return f"Str(name={self._name}, address={self.address}, length={self._length})"
@@ -412,7 +504,6 @@ class Str(Variable):
 
     def decode(self, decoder: _PayloadDecoder) -> str:
         result = decoder.decode_string(self._length)
-        print(f"decode: {result}")
         return result[: self._length].decode("utf-8")  # Remove padding!
 
     def encode(self, builder: _PayloadBuilder, value: str) -> None:
@@ -427,6 +518,8 @@ class Str(Variable):
 
 
 class Number(Variable):
+    __slots__ = ("_type",)
+
     def __init__(self, name: str, type: str, address: Optional[int] = None) -> None:
         """A variable that is a number.
 
@@ -441,8 +534,8 @@ class Number(Variable):
         super().__init__(name, address)
         self._type = type
 
-    def __eq__(self, other: Number) -> bool:
-        return super().__eq__(other) and self._type == other._type
+    def _key(self) -> tuple:
+        return super()._key() + (self._type,)
 
     def __repr__(self) -> str:
         return f"Number(name={self._name}, address={self.address}, type={self._type})"
@@ -452,7 +545,7 @@ class Number(Variable):
         bits = int(self._type[1:])
         return (bits + 7) // 8
 
-    def decode(self, decoder: pymodbus.payload.BinaryPayloadDecoder) -> ValueType:
+    def decode(self, decoder: _PayloadDecoder) -> ValueType:
         return decoder.decode_number(self._type)
 
     def encode(self, builder: _PayloadBuilder, value: ValueType):
@@ -468,11 +561,19 @@ class Chunk:
 
     Attributes:
         address: Indicates at what register to write
-        values: The values to write
+        values:
+            The values to write, either as double-bytes or as integers
+            (see ``RegisterLayout.build_payload``)
+        boundaries:
+            The offsets in ``values`` at which variables other than the
+            first start (see ``layout.coalesce_chunks``)
     """
 
     address: int
-    values: List[bytes]
+    values: Union[List[bytes], List[int]]
+    boundaries: Tuple[int, ...] = dataclasses.field(
+        default=(), compare=False, repr=False
+    )
 
 
 class _PayloadDecoder:
@@ -490,9 +591,13 @@ class _PayloadDecoder:
         Whenever a ``decode_*`` method is called, the internal pointer
         is advanced by the size of the decoded value.
         """
-        self._decoder = pymodbus.payload.BinaryPayloadDecoder(
-            payload, byteorder, wordorder
-        )
+        self._payload = payload
+        self._pointer = 0
+        self._byteorder = byteorder
+        self._wordorder = wordorder
+        # The payload with the bytes of each word swapped; only created
+        # on demand by ``unpack_numbers``.
+        self._swapped: Optional[bytes] = None
 
     @classmethod
     def from_registers(
@@ -511,34 +616,70 @@ class _PayloadDecoder:
         Basically just converts the big-endian ``int`` values of
         ``registers`` into a list of double bytes.
         """
-        # Convert list of ints to ``bytes`` object (from
-        # pymodbus.payload.BinaryPayloadDecoder.fromRegisters).
-        payload = b"".join(struct.pack("!H", x) for x in registers)
+        # Convert list of ints to ``bytes`` object (based on
+        # ``pymodbus.payload.BinaryPayloadDecoder.fromRegisters``, but
+        # packs all registers in a single call).
+        payload = struct.pack(f"!{len(registers)}H", *registers)
         return cls(payload, byteorder, wordorder)
 
     def decode_number(self, type: str) -> ValueType:
-        d = _DECODE_DISPATCH[type]
-        return getattr(self._decoder, d)()
+        """Decode a number.
+
+        Args:
+            type: The type of the number
+
+        Raises:
+            UnknownTypeError: If ``type`` is unknown
+        """
+        # Mirrors ``_PayloadBuilder._pack``: Unpack in ``wordorder``
+        # after (if necessary) swapping the bytes of each word.
+        unpacker = _NUMBER_STRUCTS.get((type, self._wordorder))
+        if unpacker is None:
+            raise UnknownTypeError(type)
+        start = self._pointer
+        self._pointer += unpacker.size
+        if self._byteorder == self._wordorder:
+            return unpacker.unpack_from(self._payload, start)[0]
+        data = _swap_bytes_in_words(self._payload[start : self._pointer])
+        return unpacker.unpack(data)[0]
+
+    def unpack_numbers(self, unpacker: struct.Struct, offset: int) -> tuple[ValueType]:
+        """Decode several numbers at once.
+
+        Args:
+            unpacker:
+                The ``struct`` format (in ``wordorder``) of the numbers
+            offset: The position of the first number (in bytes)
+
+        Unlike the ``decode_*`` methods, this doesn't move the pointer.
+        """
+        payload = self._payload
+        if self._byteorder != self._wordorder:
+            # Swap the entire payload once instead of once per number.
+            if self._swapped is None:
+                self._swapped = _swap_bytes_in_words(payload)
+            payload = self._swapped
+        return unpacker.unpack_from(payload, offset)
 
-    # TODO Fix public access by reimplementing BinaryPayloadDecoder yourself!
     def decode_bitstruct(self, fmt: str) -> tuple[ValueType]:
-        cf = bitstruct.compile(fmt)
+        cf = _compile_bitstruct(fmt)
         # It's fine to pass the entire remaining payload, even if it's too large.
-        result = cf.unpack(self._decoder._payload[self._decoder._pointer :])
-        # We can't avoid accessing the private variable here.
-        self._decoder._pointer += _bitstruct_format_size_in_bytes(fmt)
+        result = cf.unpack(self._payload[self._pointer :])
+        self._pointer += _bitstruct_format_size_in_bytes(fmt)
         return result
 
-    def decode_string(self, byte_count: int) -> str:
+    def decode_string(self, byte_count: int) -> bytes:
         padded = byte_count + (byte_count % 2)
-        return self._decoder.decode_string(padded)
+        start = self._pointer
+        self._pointer += padded
+        return self._payload[start : self._pointer]
 
     @property
     def pointer(self) -> int:
-        return self._decoder._pointer
+        return self._pointer
 
     def skip_bytes(self, count: int = 1) -> None:
-        self._decoder.skip_bytes(count)
+        self._pointer += count
 
 
 class _PayloadBuilder:
@@ -550,21 +691,30 @@ class _PayloadBuilder:
             wordorder: Wordorder of multi-byte values
 
         File-like means: Encoded values are appended to an internal
-        ``bytes`` object ("the payload").
+        ``bytearray`` object ("the payload"). The buffer is reused after
+        calling ``reset``.
         """
         self._byteorder = byteorder
         self._wordorder = wordorder
-        self._payload = b""
+        self._payload = bytearray()
 
     def reset(self) -> None:
         """Clear the payload."""
-        self._payload = b""
+        del self._payload[:]
 
     def build(self) -> list[bytes]:
         """Split the payload into a list of double-bytes and return
         it."""
-        registers = len(self._payload) // 2
-        return [self._payload[2 * i : 2 * i + 2] for i in range(registers)]
+        splitter = _word_splitter(len(self._payload) // 2)
+        return list(splitter.unpack_from(self._payload))
+
+    def build_registers(self) -> list[int]:
+        """Convert the payload into a list of big-endian 16-bit integers
+        and return it."""
+        registers = array.array("H", self._payload)
+        if sys.byteorder == "little":
+            registers.byteswap()
+        return registers.tolist()
 
     def add_bitstruct(self, fmt: str, values: list[ValueType]) -> None:
         """Encode a struct.
@@ -576,7 +726,7 @@ class _PayloadBuilder:
         Raises:
             bitstruct.Error: If encoding fails
         """
-        cf = bitstruct.compile(fmt)
+        cf = _compile_bitstruct(fmt)
         packed: bytes = cf.pack(*values)
         # Don't use ``_pack``, as we don't want to use word order to unpack!
         self._payload += packed
@@ -595,15 +745,13 @@ class _PayloadBuilder:
 
         ``type`` may be one of the following: ``"i16"``, ``"i32"``, ``"i64"``, ``"u16"``, ``"u32"``, ``"u64"``, ``"f16"``, ``"f32"``, ``"f64"``. 8-bit formats are *not* allowed!
         """
-        fmt = _TYPE_TO_STRUCT.get(type)
-        if fmt is None:
+        packer = _NUMBER_STRUCTS.get((type, self._wordorder))
+        if packer is None:
             raise UnknownTypeError(type)
-        if type in _NUMERICAL_BOUNDS:
-            min_, max_ = _NUMERICAL_BOUNDS[type]
-            if min_ > value or max_ < value:
-                raise OutOfBoundsError(type, value)
-        for r in self._pack(fmt, value):
-            self._payload += r
+        bounds = _NUMERICAL_BOUNDS.get(type)
+        if bounds is not None and not bounds[0] <= value <= bounds[1]:
+            raise OutOfBoundsError(type, value)
+        self._payload += self._pack(packer, value)
 
     def add_string(self, value: str) -> None:
         """Encode a string.
@@ -622,29 +770,35 @@ class _PayloadBuilder:
         packed = struct.pack(fmt, byte_string)
         self._payload += packed
 
-    def _pack(self, fmt: str, value: ValueType) -> bytes:
-        """Pack and pad value into format.
+    def _pack(self, packer: struct.Struct, value: ValueType) -> bytes:
+        """Pack value into format.
 
         Args:
-            fmt: The ``struct`` format to pack the value into
-            value: The value to pack and pad
+            packer:
+                The precompiled ``struct`` format (in ``wordorder``) to
+                pack the value into
+            value: The value to pack
 
         Returns:
             The value encoded into a ``bytes`` object
         """
-        # This function is based on pymodbus:
-        # https://github.com/riptideio/pymodbus/blob/master/pymodbus/payload.py,
-        # published under the MIT license.
+        # Packing in ``wordorder`` puts the words in the correct order.
+        # If ``byteorder`` differs, the bytes of each word must be
+        # swapped.
+        packed = packer.pack(value)
+        if self._byteorder == self._wordorder:
+            return packed
+        return _swap_bytes_in_words(packed)
+
 
-        # Use correct wordorder by formatting in big endian and then
-        # reversing if wordorder if little endian.
-        packed = struct.pack("!" + fmt, value)
-        size = _STRUCT_SIZE[fmt.lower()]
-        unpacked = struct.unpack(f"!{size//2}H", packed)
-        if self._wordorder == Endian.little:
-            unpacked = list(unpacked)
-            unpacked.reverse()
-        return [struct.pack(self._byteorder + "H", word) for word in unpacked]
+def _swap_bytes_in_words(data: bytes) -> bytes:
+    """Swap the two bytes of each 16-bit word of ``data``.
+
+    The length of ``data`` must be even.
+    """
+    words = array.array("H", data)
+    words.byteswap()
+    return words.tobytes()
 
 
 ALLOWED_NUMERICAL_TYPES = {
@@ -675,36 +829,12 @@ _TYPE_TO_STRUCT = {
 }
 
 
-# See https://docs.python.org/3/library/struct.html
-_STRUCT_SIZE = {
-    "c": 1,
-    "b": 1,
-    "B": 1,
-    "?": 1,
-    "h": 2,
-    "i": 4,
-    "l": 4,
-    "q": 8,
-    "e": 2,
-    "f": 4,
-    "d": 8,
-}
-
-
-_DECODE_DISPATCH = {
-    "str": "decode_string",
-    "bits": "decode_bits",
-    "i8": "decode_8bit_int",
-    "i16": "decode_16bit_int",
-    "i32": "decode_32bit_int",
-    "i64": "decode_64bit_int",
-    "u8": "decode_8bit_uint",
-    "u16": "decode_16bit_uint",
-    "u32": "decode_32bit_uint",
-    "u64": "decode_64bit_uint",
-    "f16": "decode_16bit_float",
-    "f32": "decode_32bit_float",
-    "f64": "decode_64bit_float",
+# Formats are compiled once for every type and order instead of being
+# parsed on each call of ``struct.pack``.
+_NUMBER_STRUCTS = {
+    (type_, order): struct.Struct(order + fmt)
+    for type_, fmt in _TYPE_TO_STRUCT.items()
+    for order in (Endian.little, Endian.big)
 }
 
 
@@ -720,6 +850,12 @@ _NUMERICAL_BOUNDS = {
 }
 
 
+# Structs are encoded/decoded with the same handful of formats over and
+# over again, so we compile each format only once.
+_compile_bitstruct = functools.lru_cache(maxsize=None)(bitstruct.compile)
+
+
+@functools.lru_cache(maxsize=None)
 def _bitstruct_format_size_in_bytes(fmt: str) -> int:
     """Return the size of a ``bitstruct`` format in bytes."""
     tokens = re.split("[a-z]", fmt)  # ["", "1", "7", "5", "5"]
@@ -727,6 +863,19 @@ def _bitstruct_format_size_in_bytes(fmt: str) -> int:
     return (bits + 7) // 8
 
 
+@functools.lru_cache(maxsize=None)
+def _unpacker(fmt: str) -> struct.Struct:
+    """Return the compiled ``struct`` format ``fmt``."""
+    return struct.Struct(fmt)
+
+
+@functools.lru_cache(maxsize=None)
+def _word_splitter(count: int) -> struct.Struct:
+    """Return a ``struct`` format which splits ``count`` registers into
+    double-bytes in a single call."""
+    return struct.Struct(count * "2s")
+
+
 _VARIABLE_DISPATCH = {
     "struct": Struct.load,
     "str": Str,
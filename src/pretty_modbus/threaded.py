@@ -4,10 +4,12 @@
 
 from __future__ import annotations
 
+import collections
 import dataclasses
+import math
 import multiprocessing
+import operator
 import threading
-import queue
 import time
 
 from pymodbus.register_read_message import (
@@ -15,19 +17,35 @@ from pymodbus.register_read_message import (
     ReadHoldingRegistersResponse,
 )
 from pymodbus.bit_read_message import ReadCoilsResponse, ReadDiscreteInputsResponse
-from pymodbus.bit_write_message import WriteMultipleCoilsResponse
+from pymodbus.bit_write_message import (
+    WriteMultipleCoilsResponse,
+    WriteSingleCoilResponse,
+)
 from pymodbus.register_write_message import WriteMultipleRegistersResponse
 
-from pretty_modbus.const import DEFAULT_SLAVE
+from pretty_modbus.const import DEFAULT_SLAVE, MAX_WRITE_COILS, MAX_WRITE_REGISTERS
 from pretty_modbus.exceptions import (
     ModbusResponseError,
     NotConnectedError,
     NegativePeriodError,
+    ServerError,
 )
 from pretty_modbus.context import ServerContext
+from pretty_modbus.layout import coalesce_chunks
+
+# Expected function codes of successful responses.
+_FC_READ_IR = ReadInputRegistersResponse.function_code
+_FC_READ_HR = ReadHoldingRegistersResponse.function_code
+_FC_READ_CO = ReadCoilsResponse.function_code
+_FC_READ_DI = ReadDiscreteInputsResponse.function_code
+_FC_WRITE_HR = WriteMultipleRegistersResponse.function_code
+_FC_WRITE_CO = WriteMultipleCoilsResponse.function_code
+_FC_WRITE_SINGLE_CO = WriteSingleCoilResponse.function_code
 
 CONNECTED = "__pretty_modbus__connected__"
 DISCONNECT = "__pretty_modbus__disconnect__"
+_CONNECT_RETRY_INTERVAL = 0.01
+_SHUTDOWN_TIMEOUT = 1.0
 
 
 @dataclasses.dataclass
@@ -50,6 +68,30 @@ class Daemon:
         self._job = job
         self._period = period
         self._thread: Optional[threading.Thread] = None
+        # Use multiprocessing primitives, as the daemon may be run in
+        # the child process of a ``Server``.
+        self._done = multiprocessing.Condition()
+        self._count = multiprocessing.Value("Q", 0, lock=False)
+        self._stopped = multiprocessing.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job was executed from start to finish after
+        calling this method.
+
+        Args:
+            timeout: The maximum time to wait (in seconds)
+
+        Returns:
+            ``False`` if the operation timed out, ``True`` otherwise
+
+        Use this to make sure that the job has seen changes made to
+        the datastore before calling this method.
+        """
+        with self._done:
+            # The job might be in progress right now, so we need to
+            # wait for the one after that.
+            target = self._count.value + 2
+            return self._done.wait_for(lambda: self._count.value >= target, timeout)
 
     def serve(self, *args, **kwargs) -> None:
         self._thread = threading.Thread(
@@ -57,13 +99,49 @@ class Daemon:
         )
         self._thread.start()
 
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the daemon after the current job.
+
+        Args:
+            timeout:
+                The maximum time to wait for the daemon's thread to
+                finish (in seconds); only applies if the daemon is
+                served by the calling process
+
+        Raises:
+            TimeoutError: If the thread failed to finish in time
+
+        The daemon may also be stopped from the parent process of a
+        ``Server`` that runs it.
+        """
+        self._stopped.set()
+        if self._thread is None:
+            return
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError()
+
     def _serve(self, *args, **kwargs) -> None:
-        while True:
-            start_time = time.perf_counter()
+        # Schedule against absolute deadlines to prevent drift. If the
+        # job overruns, skip the missed periods instead of running the
+        # job back-to-back to catch up.
+        deadline = time.monotonic()
+        while not self._stopped.is_set():
             self._job(*args, **kwargs)
-            diff = time.perf_counter() - start_time
-            wait = max(0, self._period - diff)
-            time.sleep(wait)
+            with self._done:
+                self._count.value += 1
+                self._done.notify_all()
+            if self._period == 0:
+                # Just yield to other threads; the loop condition
+                # already checks for ``stop``.
+                time.sleep(0)
+                continue
+            deadline += self._period
+            now = time.monotonic()
+            if deadline < now:
+                missed = math.ceil((now - deadline) / self._period)
+                deadline += missed * self._period
+            self._stopped.wait(deadline - now)
 
 
 class Server:
@@ -92,52 +170,152 @@ class Server:
             assert layout is not None
             assert "context" in kwargs
         daemons = daemons or []
+        self._stopped = multiprocessing.Event()
         self._process = multiprocessing.Process(
-            target=_server_main, args=(factory, daemons, layout), kwargs=kwargs
+            target=_server_main,
+            args=(factory, daemons, layout, self._stopped),
+            kwargs=kwargs,
         )
 
     def __del__(self):
         # Just in case the user forgot to clean up the server, this
         # might prevent some unnecessary blocking.
-        self.stop()
+        if self._process.is_alive():
+            self.stop()
 
     def start(self) -> None:
         """Start the server."""
         self._process.start()
 
-    def stop(self):
-        """Stop the server.
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for the server process to exit.
 
-        Note that this is a graceless close. pymodbus leaves us no other
-        option but to kill the containing process.
+        Args:
+            timeout: The maximum time to wait (in seconds)
+
+        Raises:
+            ServerError:
+                If the server process failed, for example because the
+                server could not be started
         """
-        self._process.terminate()
-        self._process.join()
+        self._process.join(timeout)
+        self._check_exitcode()
 
+    def stop(self, timeout: Optional[float] = _SHUTDOWN_TIMEOUT) -> None:
+        """Stop the server.
+
+        Args:
+            timeout:
+                The time to wait for the server process to exit (in
+                seconds) before killing it
 
-def _server_main(factory, daemons, layout, **kwargs) -> None:
+        Raises:
+            ServerError:
+                If the server process failed, for example because the
+                server could not be started
+
+        The server process is asked to exit and joined. Only if it
+        fails to exit in time, it is terminated.
+        """
+        if self._process.pid is None:  # Never started.
+            return
+        self._stopped.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+            return
+        self._check_exitcode()
+
+    def _check_exitcode(self) -> None:
+        exitcode = self._process.exitcode
+        if exitcode:
+            raise ServerError(exitcode)
+
+
+def _server_main(factory, daemons, layout, stopped, **kwargs) -> None:
+    if daemons:
+        # Share the context so that the daemons' transactions exclude
+        # each other.
+        server_context = ServerContext(kwargs["context"], layout)
     for daemon in daemons:
-        context = kwargs["context"]
-        server_context = ServerContext(context, layout)
         daemon.serve(server_context)
-    factory(**kwargs)
 
+    # pymodbus' servers block forever and don't expose a handle for
+    # shutting them down, so run the server on a daemon thread and exit
+    # the process when asked to.
+    errors = []
+
+    def serve_forever():
+        try:
+            factory(**kwargs)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stopped.set()
+
+    threading.Thread(target=serve_forever, daemon=True).start()
+    stopped.wait()
+    if errors:
+        # Raise in the main thread, so that the process exits with
+        # non-zero status and the parent can tell that the server failed.
+        raise errors[0]
+
+
+class _Channel:
+    def __init__(self) -> None:
+        """Single-producer, single-consumer channel between two threads.
+
+        Unlike ``queue.Queue``, this doesn't acquire a lock for every
+        ``put``/``get``; the ``deque`` operations are atomic, and the
+        event is only used for waking up the consumer.
+        """
+        self._items = collections.deque()
+        self._ready = threading.Event()
 
-class RpcCall:
-    def __init__(self, _fn: str, *args, **kwargs) -> None:
-        self._fn = _fn
-        self._args = args
-        self._kwargs = kwargs
+    def put(self, item) -> None:
+        self._items.append(item)
+        self._ready.set()
 
-    def execute(self, obj):
-        f = getattr(obj, self._fn)
-        return f(*self._args, **self._kwargs)
+    def get(self, timeout: Optional[float] = None):
+        """Remove and return the next item.
+
+        Raises:
+            TimeoutError: If no item arrived within ``timeout`` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._items:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if not self._ready.wait(remaining):
+                raise TimeoutError()
+            # Clear before checking ``_items`` again, so that an item
+            # put in the meantime is not missed.
+            self._ready.clear()
+        return self._items.popleft()
+
+
+class RpcCall(tuple):
+    """Call of a method of the pymodbus client, executed by the client
+    thread.
+
+    A tuple ``(fn, args, kwargs)``, so that creating an RPC only
+    allocates a single object.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, _fn: str, *args, **kwargs) -> RpcCall:
+        return tuple.__new__(cls, (_fn, args, kwargs))
+
+    fn = property(operator.itemgetter(0))
+    args = property(operator.itemgetter(1))
+    kwargs = property(operator.itemgetter(2))
 
 
 def _client_main(
     factory,
-    response_queue: queue.Queue,
-    command_queue: queue.Queue,
+    response_queue: _Channel,
+    command_queue: _Channel,
     *args,
     **kwargs,
 ) -> None:
@@ -145,22 +323,36 @@ def _client_main(
         client = factory(*args, **kwargs)
         client.connect()
         response_queue.put(CONNECTED)
+        # Resolve each method of ``client`` only once.
+        methods = {}
         while True:
             rpc = command_queue.get()
             if rpc == DISCONNECT:
                 response_queue.put(DISCONNECT)
                 break
-            result = rpc.execute(client)
-            response_queue.put(result)
+            if isinstance(rpc, list):
+                response_queue.put([_call(client, methods, x) for x in rpc])
+            else:
+                response_queue.put(_call(client, methods, rpc))
     except Exception as e:
         response_queue.put(UnhandledException(e))
 
 
+def _call(client, methods: dict[str, Callable], rpc: RpcCall):
+    """Execute ``rpc`` on ``client``, caching the bound method in
+    ``methods``."""
+    fn, args, kwargs = rpc
+    f = methods.get(fn)
+    if f is None:
+        f = methods[fn] = getattr(client, fn)
+    return f(*args, **kwargs)
+
+
 class Client:
     def __init__(self, factory, layout: ServerContextLayout, *args, **kwargs) -> None:
         self._layout = layout
-        self._response_queue = queue.Queue()
-        self._command_queue = queue.Queue()
+        self._response_queue = _Channel()
+        self._command_queue = _Channel()
         self._thread = threading.Thread(
             target=_client_main,
             args=(
@@ -173,11 +365,37 @@ class Client:
             daemon=True,
         )
         self._active = False
+        self._write_dispatch = {
+            "holding_registers": self.write_holding_register,
+            "coils": self.write_coil,
+        }
 
     def start(self, timeout: Optional[float] = None) -> None:
+        """Start the client thread.
+
+        Args:
+            timeout:
+                If specified, wait for at most ``timeout`` seconds for
+                the client to connect to the server
+
+        Raises:
+            NotConnectedError:
+                If ``timeout`` is specified and the client fails to
+                connect in time
+
+        The ``timeout`` is useful if the server was just started and
+        might not be accepting connections yet.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
         self._thread.start()
         assert self._response_queue.get(timeout=timeout) == CONNECTED
         self._active = True
+        if deadline is None:
+            return
+        while not self._execute("connect"):
+            if time.monotonic() > deadline:
+                raise NotConnectedError("Failed to connect to server")
+            time.sleep(_CONNECT_RETRY_INTERVAL)
 
     def stop(self, timeout: Optional[float] = None) -> None:
         # Check for errors before joining
@@ -188,10 +406,42 @@ class Client:
             raise TimeoutError()
 
     def _execute(self, _fn: str, *args, **kwargs):
+        self._submit(RpcCall(_fn, *args, **kwargs))
+        return self._receive()
+
+    def execute_many(self, calls: Iterable[RpcCall]) -> list:
+        """Execute multiple calls of methods of the pymodbus client.
+
+        Args:
+            calls: The calls to execute
+
+        Returns:
+            The results of the calls, in order
+
+        Raises:
+            NotConnectedError: If the client is not started
+
+        The calls are handed to the client thread in one batch and
+        executed back-to-back, so the cost of passing commands and
+        results between threads is only paid once. Note that the
+        responses are _not_ checked for errors.
+        """
+        self._submit(list(calls))
+        return self._receive()
+
+    def _submit(self, rpc: Union[RpcCall, list[RpcCall]]) -> None:
+        """Queue an RPC (or a batch of RPCs) without waiting for the
+        result.
+
+        The worker executes the RPCs in order, so each ``_submit`` must
+        be matched by exactly one ``_receive``.
+        """
         if not self._active:
             raise NotConnectedError()
-        rpc = RpcCall(_fn, *args, **kwargs)
         self._command_queue.put(rpc)
+
+    def _receive(self):
+        """Wait for the result of the oldest pending RPC."""
         result = self._response_queue.get()
         if isinstance(result, UnhandledException):
             raise result.error
@@ -200,19 +450,24 @@ class Client:
     def write(self, var: str, value: ValueType) -> None:
         # FIXME This is not a good solution.
         unit, type_ = self._layout.find(var)
-        assert type_ in {"holding_registers", "coils"}
-        dispatch = "write_" + type_[:-1]
-        fn = getattr(self, dispatch)
+        fn = self._write_dispatch.get(type_)
+        assert fn is not None
         fn(var, value, unit)
 
     def read_input_registers(
-        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
+        self,
+        variables: Optional[Iterable[str]] = None,
+        unit: KeyType = DEFAULT_SLAVE,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, ValueType]:
         """Read ``variables`` from input register of ``unit``.
 
         Args:
             variables: The variables to read (all by default)
             unit: The unit to read from
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one (useful for polling)
 
         Returns:
             A ``dict`` mapping the queried variable's names to their
@@ -233,9 +488,9 @@ class Client:
         response = self._execute(
             "read_input_registers", slave_layout.address, slave_layout.size, unit=unit
         )
-        if response.function_code != ReadInputRegistersResponse.function_code:
+        if response.function_code != _FC_READ_IR:
             raise ModbusResponseError(response)
-        return slave_layout.decode_registers(response.registers, variables)
+        return slave_layout.decode_registers(response.registers, variables, out)
 
     def read_input_register(self, var: str, unit: KeyType = DEFAULT_SLAVE) -> ValueType:
         """Read ``var`` from input register of ``unit``.
@@ -257,16 +512,22 @@ class Client:
         Note that this method will always execute a complete readout of
         the slave's input register layout's range.
         """
-        return self.read_input_registers(unit=unit)[var]
+        return self.read_input_registers((var,), unit=unit)[var]
 
     def read_holding_registers(
-        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
+        self,
+        variables: Optional[Iterable[str]] = None,
+        unit: KeyType = DEFAULT_SLAVE,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, ValueType]:
         """Read ``variables`` from holding register of ``unit``.
 
         Args:
             variables: The variables to read (all by default)
             unit: The unit to read from
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one (useful for polling)
 
         Returns:
             A ``dict`` mapping the queried variable's names to their
@@ -288,9 +549,9 @@ class Client:
         response = self._execute(
             "read_holding_registers", slave_layout.address, slave_layout.size, unit=unit
         )
-        if response.function_code != ReadHoldingRegistersResponse.function_code:
+        if response.function_code != _FC_READ_HR:
             raise ModbusResponseError(response)
-        return slave_layout.decode_registers(response.registers, variables)
+        return slave_layout.decode_registers(response.registers, variables, out)
 
     def read_holding_register(
         self, var: str, unit: KeyType = DEFAULT_SLAVE
@@ -315,7 +576,7 @@ class Client:
         Note that this method will always execute a complete readout of
         the slave's holding register layout's range.
         """
-        return self.read_holding_registers(unit=unit)[var]
+        return self.read_holding_registers((var,), unit=unit)[var]
 
     def write_holding_registers(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
@@ -338,19 +599,45 @@ class Client:
 
         This method will group values which occur back-to-back in memory
         into payload chunks in order to minimize the amount of write
-        requests to the server.
+        requests to the server. Chunks which exceed the maximum size of
+        a Modbus write request are split between variables. A single
+        variable which exceeds the maximum size is not written
+        atomically.
         """
         slave_layout = self._layout.get_holding_register_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            response = self._execute(
+        self.write_holding_registers_raw(slave_layout.build_payload(values), unit)
+
+    def write_holding_registers_raw(
+        self, chunks: Iterable[Chunk], unit: KeyType = DEFAULT_SLAVE
+    ) -> None:
+        """Write encoded chunks to holding register memory of ``unit``.
+
+        Args:
+            chunks:
+                The chunks to write, as returned by
+                ``RegisterLayout.build_payload`` with ``as_registers``
+                unset
+            unit: The unit to write to
+
+        Raises:
+            ModbusResponseError: If writing to the slave failed
+
+        Use this to skip encoding if the same values are written
+        repeatedly: Build the payload once and pass it to every call.
+        """
+        payloads = coalesce_chunks(chunks, MAX_WRITE_REGISTERS)
+        responses = self.execute_many(
+            RpcCall(
                 "write_registers",
                 payload.address,
                 payload.values,
                 skip_encode=True,
                 unit=unit,
             )
-            if response.function_code != WriteMultipleRegistersResponse.function_code:
+            for payload in payloads
+        )
+        for response in responses:
+            if response.function_code != _FC_WRITE_HR:
                 raise ModbusResponseError(response)
 
     def write_holding_register(
@@ -372,7 +659,21 @@ class Client:
                 If there is no memory layout defined for holding
                 registers
         """
-        self.write_holding_registers({var: value}, unit)
+        slave_layout = self._layout.get_holding_register_layout(unit)
+        payloads = slave_layout.build_payload({var: value})
+        if len(payloads) != 1 or len(payloads[0].values) > MAX_WRITE_REGISTERS:
+            self.write_holding_registers({var: value}, unit)
+            return
+        (payload,) = payloads
+        response = self._execute(
+            "write_registers",
+            payload.address,
+            payload.values,
+            skip_encode=True,
+            unit=unit,
+        )
+        if response.function_code != _FC_WRITE_HR:
+            raise ModbusResponseError(response)
 
     def write_coils(
         self, values: dict[str, ValueType], unit: KeyType = DEFAULT_SLAVE
@@ -394,15 +695,19 @@ class Client:
 
         This method will group values which occur back-to-back in memory
         into payload chunks in order to minimize the amount of write
-        requests to the server.
+        requests to the server. Chunks which exceed the maximum size of
+        a Modbus write request are split between variables. A single
+        variable which exceeds the maximum size is not written
+        atomically.
         """
         slave_layout = self._layout.get_coil_layout(unit)
-        payloads = slave_layout.build_payload(values)
-        for payload in payloads:
-            response = self._execute(
-                "write_coils", payload.address, payload.values, unit=unit
-            )
-            if response.function_code != WriteMultipleCoilsResponse.function_code:
+        payloads = coalesce_chunks(slave_layout.build_payload(values), MAX_WRITE_COILS)
+        responses = self.execute_many(
+            RpcCall("write_coils", payload.address, payload.values, unit=unit)
+            for payload in payloads
+        )
+        for response in responses:
+            if response.function_code != _FC_WRITE_CO:
                 raise ModbusResponseError(response)
 
     def write_coil(
@@ -422,16 +727,33 @@ class Client:
             MissingSubLayoutError:
                 If there is no memory layout defined for coils
         """
-        self.write_coils({var: value}, unit)
+        slave_layout = self._layout.get_coil_layout(unit)
+        payloads = slave_layout.build_payload({var: value})
+        if len(payloads) != 1 or len(payloads[0].values) != 1:
+            self.write_coils({var: value}, unit)
+            return
+        (payload,) = payloads
+        # Use the more compact single coil request for single bits.
+        response = self._execute(
+            "write_coil", payload.address, payload.values[0], unit=unit
+        )
+        if response.function_code != _FC_WRITE_SINGLE_CO:
+            raise ModbusResponseError(response)
 
     def read_coils(
-        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
+        self,
+        variables: Optional[Iterable[str]] = None,
+        unit: KeyType = DEFAULT_SLAVE,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, ValueTypes]:
         """Read ``variables`` from coils of ``unit``.
 
         Args:
             variables: The variables to read (all by default)
             unit: The unit to read from
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one (useful for polling)
 
         Returns:
             A ``dict`` mapping the queried variable's names to their
@@ -452,9 +774,9 @@ class Client:
         response = self._execute(
             "read_coils", slave_layout.address, slave_layout.size, unit=unit
         )
-        if response.function_code != ReadCoilsResponse.function_code:
+        if response.function_code != _FC_READ_CO:
             raise ModbusResponseError(response)
-        return slave_layout.decode_coils(response.bits, variables)
+        return slave_layout.decode_coils(response.bits, variables, out)
 
     def read_coil(self, var: str, unit: KeyType = DEFAULT_SLAVE) -> list[bool]:
         """Read ``var`` from coil memory of ``unit``.
@@ -475,16 +797,22 @@ class Client:
         Note that this method will always execute a complete readout of
         the slave's coil layout's range.
         """
-        return self.read_coils(unit=unit)[var]
+        return self.read_coils((var,), unit=unit)[var]
 
     def read_discrete_inputs(
-        self, variables: Optional[Iterable[str]] = None, unit: KeyType = DEFAULT_SLAVE
+        self,
+        variables: Optional[Iterable[str]] = None,
+        unit: KeyType = DEFAULT_SLAVE,
+        out: Optional[dict[str, ValueType]] = None,
     ) -> dict[str, list[bool]]:
         """Read ``variables`` from discrete inputs of ``unit``.
 
         Args:
             variables: The variables to read (all by default)
             unit: The unit to read from
+            out:
+                A ``dict`` to clear and store the result in instead of
+                creating a new one (useful for polling)
 
         Returns:
             A ``dict`` mapping the queried variable's names to their
@@ -505,9 +833,9 @@ class Client:
         response = self._execute(
             "read_discrete_inputs", slave_layout.address, slave_layout.size, unit=unit
         )
-        if response.function_code != ReadDiscreteInputsResponse.function_code:
+        if response.function_code != _FC_READ_DI:
             raise ModbusResponseError(response)
-        return slave_layout.decode_coils(response.bits, variables)
+        return slave_layout.decode_coils(response.bits, variables, out)
 
     def read_discrete_input(
         self, variable: str, unit: KeyType = DEFAULT_SLAVE
@@ -531,4 +859,4 @@ class Client:
         Note that this method will always execute a complete readout of
         the slave's discrete input layout's range.
         """
-        return self.read_discrete_inputs(unit=unit)[variable]
+        return self.read_discrete_inputs((variable,), unit=unit)[variable]
@@ -19,12 +19,12 @@ from pretty_modbus.factories import create_tcp_server
 from pretty_modbus import threaded
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def host():
     return "0.0.0.0"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def port():
     return 5020
 
@@ -41,8 +41,10 @@ def client(event_loop, host, port):
     return client
 
 
-@pytest.fixture
-def threaded_client(client, server_context_layout, port):
+# Module-scoped, as connecting the client is by far the most expensive
+# part of most threaded tests.
+@pytest.fixture(scope="module")
+def threaded_client(server_context_layout, port):
     client = threaded.Client(
         ModbusTcpClient, server_context_layout, address="0.0.0.0", port=port
     )
@@ -51,7 +53,7 @@ def threaded_client(client, server_context_layout, port):
     client.stop(timeout=3.33)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def modbus_context():
     return pymodbus.datastore.ModbusServerContext(
         slaves={
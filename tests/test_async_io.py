@@ -2,7 +2,11 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import asyncio
+import struct
+
 import pytest
+from pymodbus.register_write_message import WriteMultipleRegistersResponse
 
 from pretty_modbus import exceptions
 from pretty_modbus import async_io
@@ -11,7 +15,27 @@ from pretty_modbus import registers
 from pretty_modbus import coils
 
 
-@pytest.fixture
+_MISSING_LAYOUT = pytest.mark.parametrize(
+    "unit, error",
+    [
+        (3, exceptions.MissingSubLayoutError),
+        (4, exceptions.NoSuchSlaveLayoutError),
+    ],
+)
+
+(_F16,) = struct.unpack("e", struct.pack("e", 3.4))
+
+
+# Share one loop between the tests of this module instead of paying for
+# a fresh loop per test.
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
 def holding_register_layout():
     return registers.RegisterLayout(
         [
@@ -31,7 +55,7 @@ def holding_register_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def input_register_layout():
     return registers.RegisterLayout(
         [
@@ -43,7 +67,7 @@ def input_register_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def coil_layout():
     return coils.CoilLayout(
         [
@@ -56,7 +80,7 @@ def coil_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def discrete_input_layout():
     return coils.CoilLayout(
         [
@@ -67,7 +91,7 @@ def discrete_input_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def server_context_layout(
     holding_register_layout, input_register_layout, coil_layout, discrete_input_layout
 ):
@@ -127,65 +151,27 @@ class TestProtocol:
         with pytest.raises(exceptions.VariableNotFoundError):
             await protocol.write_holding_register("spam", 123)
 
+    @pytest.mark.parametrize(
+        "op, args",
+        [
+            ("write_holding_registers", ({"a": 1},)),
+            ("write_holding_register", ("a", 1)),
+            ("write_coils", ({"a": 1},)),
+            ("write_coil", ("a", 1)),
+            ("read_holding_register", ("a",)),
+            ("read_holding_registers", ("a",)),
+            ("read_input_register", ("a",)),
+            ("read_input_registers", ("a",)),
+            ("read_coil", ("a",)),
+            ("read_coils", ("a",)),
+            ("read_discrete_input", ("a",)),
+            ("read_discrete_inputs", ({},)),
+        ],
+    )
     @pytest.mark.asyncio
-    async def test_write_holding_registers_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.write_holding_registers({"a": 1}, unit=2)
-
-    @pytest.mark.asyncio
-    async def test_write_holding_register_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.write_holding_register("a", 1, unit=2)
-
-    @pytest.mark.asyncio
-    async def test_write_coils_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.write_coils({"a": 1}, unit=2)
-
-    @pytest.mark.asyncio
-    async def test_write_coil_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.write_coil("a", 1, unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_holding_register_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_holding_register("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_holding_registers_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_holding_registers("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_input_register_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_input_register("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_input_registers_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_input_registers("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_coil_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_coil("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_coils_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_coils("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_discrete_input_failure(self, protocol):
-        with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_discrete_input("a", unit=2)
-
-    @pytest.mark.asyncio
-    async def test_read_discrete_input_failure(self, protocol):
+    async def test_failure(self, op, args, protocol):
         with pytest.raises(exceptions.ModbusResponseError):
-            await protocol.read_discrete_inputs({}, unit=2)
+            await getattr(protocol, op)(*args, unit=2)
 
     @pytest.mark.asyncio
     async def test_write_holding_registers_read_holding_registers(self, protocol):
@@ -209,7 +195,7 @@ class TestProtocol:
                 "ELEMENT_TYPE": 33,
                 "ELEMENT_ID": 7,
             },
-            "f": pytest.approx(3.4, abs=0.001),
+            "f": _F16,
         }
         await protocol.write_holding_register("str", "world")
         assert await protocol.read_holding_register("str") == "world"
@@ -219,9 +205,7 @@ class TestProtocol:
             "ELEMENT_TYPE": 33,
             "ELEMENT_ID": 7,
         }
-        assert await protocol.read_holding_register("f") == pytest.approx(
-            3.4, abs=0.001
-        )
+        assert await protocol.read_holding_register("f") == _F16
         assert await protocol.read_holding_registers({"i", "str"}) == {
             "i": 12,
             "str": "world",
@@ -242,6 +226,46 @@ class TestProtocol:
         assert await protocol.read_holding_register("str", unit=0) == "world"
         assert await protocol.read_holding_register("str", unit=1) == "hello"
 
+    @pytest.mark.asyncio
+    async def test_write_holding_register_nowait(self, protocol):
+        await protocol.write_holding_register("i", 7, nowait=True)
+        await protocol.write_holding_register("str", "nowai", nowait=True)
+        await protocol.drain()
+        assert await protocol.read_holding_registers({"i", "str"}) == {
+            "i": 7,
+            "str": "nowai",
+        }
+
+    @pytest.mark.asyncio
+    async def test_write_coil_nowait_failure(self, protocol):
+        await protocol.write_coil("a", 1, unit=2, nowait=True)
+        await protocol.write_holding_register("a", 1, unit=2, nowait=True)
+        with pytest.raises(exceptions.PendingWriteError) as e:
+            await protocol.drain()
+        assert len(e.value.errors) == 2
+        for error in e.value.errors:
+            assert isinstance(error, exceptions.ModbusResponseError)
+        # The errors are reported only once.
+        await protocol.drain()
+
+    @pytest.mark.asyncio
+    async def test_write_holding_register_nowait_variable_not_found(self, protocol):
+        # Encoding errors are raised immediately, not by ``drain``.
+        with pytest.raises(exceptions.VariableNotFoundError):
+            await protocol.write_holding_register("spam", 1, nowait=True)
+        with pytest.raises(exceptions.OutOfBoundsError):
+            await protocol.write_holding_register("i", 2**31, nowait=True)
+        await protocol.drain()
+
+    @pytest.mark.asyncio
+    async def test_read_holding_registers_many(self, protocol):
+        await protocol.write_holding_register("str", "world", unit=0)
+        await protocol.write_holding_register("str", "hello", unit=1)
+        assert await protocol.read_holding_registers_many([0, 1], {"str"}) == {
+            0: {"str": "world"},
+            1: {"str": "hello"},
+        }
+
     @pytest.mark.asyncio
     async def test_write_coils_read_coils(self, protocol):
         values = {
@@ -255,153 +279,118 @@ class TestProtocol:
         assert await protocol.read_coils() == values
 
     @pytest.mark.asyncio
-    async def test_read_discrete_inputs(self, protocol):
-        assert await protocol.read_discrete_inputs(unit=1) == {
-            "a": 0,
-            "b": [0, 0],
-            "c": [0, 0, 0],
-        }
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_read_input_registers_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_input_registers(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_read_input_register_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_input_register("", unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_read_discrete_inputs_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_discrete_inputs(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_read_discrete_input_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_discrete_input("", unit=unit)
+    async def test_write_coils_read_coils_max_inflight(
+        self, client, server_context_layout
+    ):
+        protocol = async_io.Protocol(
+            client.protocol, server_context_layout, max_inflight=1
+        )
+        values = {"x": [1, 1, 0], "y": 0, "z": [1, 0, 1, 0, 1], "u": 1, "v": [0, 1]}
+        await protocol.write_coils(values)
+        assert await protocol.read_coils() == values
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
     @pytest.mark.asyncio
-    async def test_read_holding_registers_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_holding_registers(unit=unit)
+    async def test_read_holding_registers_many_max_inflight(
+        self, protocol, client, server_context_layout, event_loop, monkeypatch
+    ):
+        await protocol.write_holding_register("str", "world", unit=0)
+        await protocol.write_holding_register("str", "hello", unit=1)
+        limited = async_io.Client(
+            event_loop, client, server_context_layout, max_inflight=1
+        ).protocol
+        inflight = 0
+        peak = 0
+        read_holding_registers = client.protocol.read_holding_registers
+
+        async def counting_read_holding_registers(*args, **kwargs):
+            nonlocal inflight, peak
+            inflight += 1
+            peak = max(peak, inflight)
+            try:
+                return await read_holding_registers(*args, **kwargs)
+            finally:
+                inflight -= 1
+
+        monkeypatch.setattr(
+            client.protocol, "read_holding_registers", counting_read_holding_registers
+        )
+        assert await limited.read_holding_registers_many([0, 1], {"str"}) == {
+            0: {"str": "world"},
+            1: {"str": "hello"},
+        }
+        assert peak == 1
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
     @pytest.mark.asyncio
-    async def test_read_holding_register_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_holding_register("", unit=unit)
+    async def test_write_holding_registers_split_between_variables(
+        self, client, monkeypatch
+    ):
+        names = [f"x{i}" for i in range(62)]
+        large_layout = ServerContextLayout(
+            {
+                0: SlaveContextLayout(
+                    holding_registers=registers.RegisterLayout(
+                        [registers.Number(name, "f64") for name in names]
+                    )
+                )
+            }
+        )
+        requests = []
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_write_holding_registers_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.write_holding_registers({}, unit=unit)
+        async def write_registers(address, values, **kwargs):
+            requests.append((address, len(values)))
+            return WriteMultipleRegistersResponse(address, len(values))
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    @pytest.mark.asyncio
-    async def test_write_holding_register_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.write_holding_register("", 0, unit=unit)
+        monkeypatch.setattr(client.protocol, "write_registers", write_registers)
+        protocol = async_io.Protocol(client.protocol, large_layout)
+        await protocol.write_holding_registers({name: 1.0 for name in names})
+        # No ``f64`` is spread over two requests.
+        assert sorted(requests) == [(0, 120), (120, 120), (240, 8)]
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
     @pytest.mark.asyncio
-    async def test_read_coils_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_coils(unit=unit)
+    async def test_read_raw(self, protocol):
+        await protocol.write_holding_registers({"a": 1, "b": 2, "c": 3}, unit=1)
+        address, registers = await protocol.read_holding_registers_raw(unit=1)
+        assert address == 0
+        assert registers[:3] == [1, 2, 3]
+        assert await protocol.read_discrete_inputs_raw(unit=1) == (0, [False] * 6)
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
     @pytest.mark.asyncio
-    async def test_read_coil_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.read_coil("", unit=unit)
+    async def test_write_holding_registers_raw(self, protocol, server_context_layout):
+        layout = server_context_layout.get_holding_register_layout(1)
+        payload = layout.build_payload({"a": 4, "c": 6})
+        await protocol.write_holding_registers_raw(payload, unit=1)
+        assert await protocol.read_holding_registers({"a", "c"}, unit=1) == {
+            "a": 4,
+            "c": 6,
+        }
 
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
     @pytest.mark.asyncio
-    async def test_write_coils_missing_layout(self, unit, error, protocol):
-        with pytest.raises(error):
-            await protocol.write_coils({}, unit=unit)
+    async def test_read_discrete_inputs(self, protocol):
+        assert await protocol.read_discrete_inputs(unit=1) == {
+            "a": 0,
+            "b": [0, 0],
+            "c": [0, 0, 0],
+        }
 
     @pytest.mark.parametrize(
-        "unit, error",
+        "op, args",
         [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
+            ("read_input_registers", ()),
+            ("read_input_register", ("",)),
+            ("read_discrete_inputs", ()),
+            ("read_discrete_input", ("",)),
+            ("read_holding_registers", ()),
+            ("read_holding_register", ("",)),
+            ("write_holding_registers", ({},)),
+            ("write_holding_register", ("", 0)),
+            ("read_coils", ()),
+            ("read_coil", ("",)),
+            ("write_coils", ({},)),
+            ("write_coil", ("", 0)),
         ],
     )
+    @_MISSING_LAYOUT
     @pytest.mark.asyncio
-    async def test_write_coil_missing_layout(self, unit, error, protocol):
+    async def test_missing_layout(self, op, args, unit, error, protocol):
         with pytest.raises(error):
-            await protocol.write_coil("", 0, unit=unit)
+            await getattr(protocol, op)(*args, unit=unit)
@@ -48,10 +48,12 @@ class TestCoilLayout:
             coils.CoilLayout(variables)
 
     def test_build_payload_failure(self, layout):
+        size = len(layout._plan_cache)
         with pytest.raises(VariableNotFoundError):
             layout.build_payload({"x": [1, 2, 3], "a": 0})
+        assert len(layout._plan_cache) == size
 
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def layout(self):
         return coils.CoilLayout(
             [
@@ -64,19 +66,21 @@ class TestCoilLayout:
         )
 
     def test_build_payload(self, layout):
-        payload = layout.build_payload(
-            {"x": [0, 1, 0], "y": 1, "z": [0, 0, 1, 1, 0], "v": [0, 1]}
-        )
-        assert payload == [
-            coils.Chunk(2, [0, 1, 0]),
-            coils.Chunk(7, [1, 0, 0, 1, 1, 0]),
-            coils.Chunk(14, [0, 1]),
-        ]
+        # Build twice to make sure that cached plans give the same result.
+        for _ in range(2):
+            payload = layout.build_payload(
+                {"x": [0, 1, 0], "y": 1, "z": [0, 0, 1, 1, 0], "v": [0, 1]}
+            )
+            assert payload == [
+                coils.Chunk(2, [0, 1, 0]),
+                coils.Chunk(7, [1, 0, 0, 1, 1, 0]),
+                coils.Chunk(14, [0, 1]),
+            ]
 
     def test_build_payload_empty(self, layout):
         assert layout.build_payload({}) == []
 
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def data(self):
         return [
             {"name": "x", "size": 3, "address": 2},
@@ -2,6 +2,9 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import asyncio
+import struct
+import threading
 import pytest
 import pymodbus.datastore
 import pymodbus.datastore.context
@@ -12,6 +15,24 @@ from pretty_modbus import registers
 from pretty_modbus import coils
 from pretty_modbus import exceptions
 
+# `ModbusSequentialDataBlock` copies its initial values into a fresh
+# list, so one shared template is safe to pass to every block.
+_ZEROS = (0,) * 100
+
+
+_MISSING_LAYOUT = pytest.mark.parametrize(
+    "unit, error",
+    [
+        (0, exceptions.MissingSubLayoutError),
+        (1, exceptions.NoSuchSlaveLayoutError),
+        (2, exceptions.NoSuchSlaveError),
+    ],
+)
+
+# ``f16`` round-trips are exact, so compare against the value that
+# 3.4 rounds to in half precision.
+(_F16,) = struct.unpack("e", struct.pack("e", 3.4))
+
 
 # Need a different pymodbus context here, as we need to check the correct
 # initialization (the "session" modbus_context may have been written
@@ -21,17 +42,17 @@ def modbus_context():
     return pymodbus.datastore.ModbusServerContext(
         slaves={
             0: pymodbus.datastore.ModbusSlaveContext(
-                hr=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                ir=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                co=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                di=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
+                hr=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                ir=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                co=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                di=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
                 zero_mode=True,
             ),
             1: pymodbus.datastore.ModbusSlaveContext(
-                hr=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                ir=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                co=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
-                di=pymodbus.datastore.ModbusSequentialDataBlock(0, [0] * 100),
+                hr=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                ir=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                co=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+                di=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
                 zero_mode=True,
             ),
         },
@@ -66,7 +87,7 @@ class TestServerContext:
                 "ELEMENT_TYPE": 33,
                 "ELEMENT_ID": 7,
             },
-            "f": pytest.approx(3.4, abs=0.001),
+            "f": _F16,
         }
 
     def test_set_coils_get_coils(self, pylab_context):
@@ -87,11 +108,64 @@ class TestServerContext:
         pylab_context.set_discrete_inputs(values)
         assert pylab_context.get_discrete_inputs(values) == values
 
+    def test_transact(self, pylab_context):
+        pylab_context.set_input_registers({"a": 1, "b": 2, "c": 3})
+
+        def write(values):
+            ir = values["input_registers"]
+            return {"discrete_inputs": {"a": ir["a"] < ir["b"], "c": [1, 1, 0]}}
+
+        result = pylab_context.transact(["input_registers"], write)
+        assert result == {"input_registers": {"a": 1, "b": 2, "c": 3}}
+        assert pylab_context.get_discrete_inputs({"a", "c"}) == {
+            "a": 1,
+            "c": [1, 1, 0],
+        }
+
+    def test_transact_excludes_plain_access(self, pylab_context):
+        pylab_context.set_input_registers({"a": 1, "b": 2, "c": 3})
+        thread = threading.Thread(
+            target=pylab_context.set_input_registers, args=({"a": 7},)
+        )
+
+        def write(values):
+            thread.start()
+            thread.join(0.1)
+            # The plain write must wait for the transaction to finish.
+            assert thread.is_alive()
+            return {"input_registers": {"b": values["input_registers"]["a"] + 10}}
+
+        pylab_context.transact(["input_registers"], write)
+        thread.join()
+        assert pylab_context.get_input_registers() == {"a": 7, "b": 11, "c": 3}
+
+    def test_replace_slave_context(self, pylab_context, modbus_context):
+        pylab_context.set_input_registers({"a": 1, "b": 2, "c": 3})
+        modbus_context[0] = pymodbus.datastore.ModbusSlaveContext(
+            ir=pymodbus.datastore.ModbusSequentialDataBlock(0, _ZEROS),
+            zero_mode=True,
+        )
+        assert pylab_context.get_input_registers() == {"a": 0, "b": 0, "c": 0}
+
+    @pytest.mark.asyncio
+    async def test_set_input_registers_coro_get_input_registers_coro(
+        self, pylab_context
+    ):
+        values = {"a": 7, "b": 8, "c": 9}
+        await pylab_context.set_input_registers_coro(values)
+        assert await pylab_context.get_input_registers_coro() == values
+
+    @pytest.mark.asyncio
+    async def test_set_coils_coro_failure(self, pylab_context):
+        task = asyncio.create_task(pylab_context.set_coils_coro({"spam": 12}))
+        with pytest.raises(exceptions.VariableNotFoundError):
+            await task
+
     @pytest.fixture
     def pylab_context(self, modbus_context, server_layout):
         return context.ServerContext(modbus_context, server_layout)
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def server_layout(self):
         return ServerContextLayout(
             {
@@ -141,119 +215,42 @@ class TestServerContext:
         )
 
     @pytest.fixture
-    def dummy_context(self, modbus_context):
-        return context.ServerContext(
-            modbus_context,
-            ServerContextLayout(
-                {
-                    0: SlaveContextLayout(),
-                    # Minimum functioning slave context.
-                    2: SlaveContextLayout(
-                        holding_registers=registers.RegisterLayout(
-                            [registers.Number("", "i32")]
-                        ),
-                        input_registers=registers.RegisterLayout(
-                            [registers.Number("", "i32")]
-                        ),
-                        coils=coils.CoilLayout([coils.Variable("")]),
-                        discrete_inputs=coils.CoilLayout([coils.Variable("")]),
+    def dummy_context(self, modbus_context, dummy_layout):
+        return context.ServerContext(modbus_context, dummy_layout)
+
+    @pytest.fixture(scope="module")
+    def dummy_layout(self):
+        return ServerContextLayout(
+            {
+                0: SlaveContextLayout(),
+                # Minimum functioning slave context.
+                2: SlaveContextLayout(
+                    holding_registers=registers.RegisterLayout(
+                        [registers.Number("", "i32")]
                     ),
-                }
-            ),
+                    input_registers=registers.RegisterLayout(
+                        [registers.Number("", "i32")]
+                    ),
+                    coils=coils.CoilLayout([coils.Variable("")]),
+                    discrete_inputs=coils.CoilLayout([coils.Variable("")]),
+                ),
+            }
         )
 
     @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_get_input_registers_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.get_input_registers({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_set_input_registers_failure(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.set_input_registers({"": 1}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_get_holding_registers_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.get_holding_registers({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_set_holding_registers_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.set_holding_registers({"": 1}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_get_coils_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.get_coils({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_set_coils_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.set_coils({"": 1}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
-        ],
-    )
-    def test_get_discrete_inputs_missing_layout(self, unit, error, dummy_context):
-        with pytest.raises(error):
-            dummy_context.get_discrete_inputs({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
+        "op, arg",
         [
-            (0, exceptions.MissingSubLayoutError),
-            (1, exceptions.NoSuchSlaveLayoutError),
-            (2, exceptions.NoSuchSlaveError),
+            ("get_input_registers", {}),
+            ("set_input_registers", {"": 1}),
+            ("get_holding_registers", {}),
+            ("set_holding_registers", {"": 1}),
+            ("get_coils", {}),
+            ("set_coils", {"": 1}),
+            ("get_discrete_inputs", {}),
+            ("set_discrete_inputs", {"": 1}),
         ],
     )
-    def test_set_discrete_inputs_missing_layout(self, unit, error, dummy_context):
+    @_MISSING_LAYOUT
+    def test_missing_layout(self, op, arg, unit, error, dummy_context):
         with pytest.raises(error):
-            dummy_context.set_discrete_inputs({"": 1}, unit=unit)
+            getattr(dummy_context, op)(arg, unit=unit)
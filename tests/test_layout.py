@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import asyncio
+import dataclasses
+import pickle
 
 import pytest
 
@@ -10,6 +12,7 @@ from pretty_modbus import layout
 from pretty_modbus import registers
 from pretty_modbus import coils
 from pretty_modbus import async_io
+from pretty_modbus import exceptions
 
 
 @pytest.fixture
@@ -66,3 +69,153 @@ def discrete_input_layout():
             coils.Variable("c", 3),
         ]
     )
+
+
+@pytest.mark.parametrize(
+    "chunks, max_size, expected",
+    [
+        (
+            [registers.Chunk(3, [b"\x00\x01"]), registers.Chunk(0, [b"\x00\x02"] * 3)],
+            123,
+            [registers.Chunk(0, [b"\x00\x02"] * 3 + [b"\x00\x01"])],
+        ),
+        (
+            [registers.Chunk(0, [b"\x00\x02"]), registers.Chunk(1, (b"\x00\x01",))],
+            123,
+            [registers.Chunk(0, [b"\x00\x02", b"\x00\x01"])],
+        ),
+        (
+            [coils.Chunk(0, [True] * 5), coils.Chunk(7, [False])],
+            2,
+            [
+                coils.Chunk(0, [True, True]),
+                coils.Chunk(2, [True, True]),
+                coils.Chunk(4, [True]),
+                coils.Chunk(7, [False]),
+            ],
+        ),
+    ],
+)
+def test_coalesce_chunks(chunks, max_size, expected):
+    assert layout.coalesce_chunks(chunks, max_size) == expected
+
+
+def test_coalesce_chunks_splits_between_variables():
+    reg_layout = registers.RegisterLayout(
+        [registers.Number(f"x{i}", "f64") for i in range(62)]
+    )
+    payload = reg_layout.build_payload({f"x{i}": float(i) for i in range(62)})
+    chunks = layout.coalesce_chunks(payload, 123)
+    # 62 * 4 registers; 30 variables fit into one request.
+    assert [(c.address, len(c.values)) for c in chunks] == [
+        (0, 120),
+        (120, 120),
+        (240, 8),
+    ]
+    assert [v for c in chunks for v in c.values] == payload[0].values
+
+
+def test_coalesce_chunks_splits_oversized_variable():
+    chunks = layout.coalesce_chunks(
+        [coils.Chunk(0, [True]), coils.Chunk(1, [False] * 5, (2,))], 2
+    )
+    assert chunks == [
+        coils.Chunk(0, [True]),
+        coils.Chunk(1, [False, False]),
+        coils.Chunk(3, [False, False]),
+        coils.Chunk(5, [False]),
+    ]
+
+
+def test_slave_context_layout_is_dataclass(coil_layout):
+    slave = layout.SlaveContextLayout(coils=coil_layout)
+    assert dataclasses.replace(slave, coils=None) == layout.SlaveContextLayout()
+    assert dataclasses.asdict(slave)["holding_registers"] is None
+
+
+def test_slave_context_layout_field_order():
+    # The positional order of ``__init__`` and the ``repr`` must agree.
+    slave = layout.SlaveContextLayout(1, 2, 3, 4)
+    assert repr(slave) == (
+        "SlaveContextLayout("
+        "holding_registers=1, input_registers=2, coils=3, discrete_inputs=4)"
+    )
+
+
+class TestServerContextLayout:
+    @pytest.fixture
+    def server_context_layout(
+        self,
+        holding_register_layout,
+        input_register_layout,
+        coil_layout,
+        discrete_input_layout,
+    ):
+        return layout.ServerContextLayout(
+            {
+                0: layout.SlaveContextLayout(
+                    holding_registers=holding_register_layout,
+                    input_registers=input_register_layout,
+                ),
+                1: layout.SlaveContextLayout(
+                    coils=coil_layout, discrete_inputs=discrete_input_layout
+                ),
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "var, expected",
+        [
+            ("str", (0, "holding_registers")),
+            ("a", (0, "input_registers")),
+            ("x", (1, "coils")),
+        ],
+    )
+    def test_find(self, server_context_layout, var, expected):
+        assert server_context_layout.find(var) == expected
+
+    def test_find_failure(self, server_context_layout):
+        with pytest.raises(exceptions.VariableNotFoundError):
+            server_context_layout.find("spam")
+
+    @pytest.mark.parametrize(
+        "var, unit, expected",
+        [
+            ("a", 0, "input_registers"),
+            ("a", 1, "discrete_inputs"),
+        ],
+    )
+    def test_where(self, server_context_layout, var, unit, expected):
+        assert server_context_layout.where(var, unit) == expected
+
+    @pytest.mark.parametrize(
+        "var, unit, error",
+        [
+            ("x", 0, exceptions.VariableNotFoundError),
+            ("x", 2, exceptions.NoSuchSlaveLayoutError),
+        ],
+    )
+    def test_where_failure(self, server_context_layout, var, unit, error):
+        with pytest.raises(error):
+            server_context_layout.where(var, unit)
+
+    def test_pickle(self, server_context_layout, holding_register_layout, coil_layout):
+        # ``threaded.Server`` passes the layout to its child process.
+        loaded = pickle.loads(pickle.dumps(server_context_layout))
+        assert loaded.get_holding_register_layout(0) == holding_register_layout
+        assert loaded.get_coil_layout(1) == coil_layout
+        assert loaded.find("x") == (1, "coils")
+
+    def test_mutation_after_construction(self, coil_layout):
+        slave = layout.SlaveContextLayout()
+        slaves = {0: slave}
+        server_context_layout = layout.ServerContextLayout(slaves)
+        slave.coils = coil_layout
+        slaves[1] = layout.SlaveContextLayout(coils=coil_layout)
+        # The slave layouts are resolved on construction.
+        with pytest.raises(exceptions.MissingSubLayoutError):
+            server_context_layout.get_coil_layout(0)
+        with pytest.raises(exceptions.NoSuchSlaveLayoutError):
+            server_context_layout.get_coil_layout(1)
+        with pytest.raises(exceptions.VariableNotFoundError):
+            server_context_layout.find("x")
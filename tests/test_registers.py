@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import pickle
+
 import pytest
 
 from pretty_modbus import registers
@@ -85,14 +87,73 @@ class TestRegisterLayout:
             registers.RegisterLayout(variables)
 
     def test_build_payload_failure(self, layout):
+        size = len(layout._plan_cache)
         with pytest.raises(VariableNotFoundError):
             layout.build_payload({"str": "hello", "world": "!"})
+        # Invalid sets of names must not be cached.
+        assert len(layout._plan_cache) == size
+
+    def test_build_payload_plans_are_per_layout(self):
+        first, second = (
+            registers.RegisterLayout([registers.Number("a", "u16")]) for _ in range(2)
+        )
+        assert first == second
+        first.build_payload({"a": 1})
+        second.build_payload({"a": 1})
+        [(_, [var], _)] = second._plan_cache.get(frozenset({"a"}))
+        assert var is second._variables[0]
+
+    def test_build_payload(self, layout):
+        # Build twice to make sure that cached plans give the same result.
+        for _ in range(2):
+            assert layout.build_payload({"str": "hello", "i": 3, "f": 1.0}) == [
+                registers.Chunk(2, [b"he", b"ll", b"o ", b"\x00\x00", b"\x03\x00"]),
+                registers.Chunk(20, [b"\x00<"]),
+            ]
+
+    def test_build_payload_as_registers(self, layout):
+        assert layout.build_payload(
+            {"str": "hello", "i": 3, "f": 1.0}, as_registers=True
+        ) == [
+            registers.Chunk(2, [0x6865, 0x6C6C, 0x6F20, 0x0000, 0x0300]),
+            registers.Chunk(20, [0x003C]),
+        ]
+
+    @pytest.mark.parametrize("byteorder, wordorder", [("<", ">"), (">", ">")])
+    def test_decode_registers(self, byteorder, wordorder):
+        layout = registers.RegisterLayout(
+            [
+                registers.Number("a", "u16"),
+                registers.Number("b", "i32"),
+                registers.Str("str", length=3),
+                registers.Number("c", "f64", address=9),
+                registers.Number("d", "i16", address=14),
+            ],
+            byteorder=byteorder,
+            wordorder=wordorder,
+        )
+        values = {"a": 7, "b": -123456, "str": "abc", "c": 3.141, "d": -2}
+        memory = [0] * layout.size
+        for chunk in layout.build_payload(values, as_registers=True):
+            memory[chunk.address : chunk.address + len(chunk.values)] = chunk.values
+        assert layout.decode_registers(memory) == values
+        assert layout.decode_registers(memory, {"b", "d"}) == {"b": -123456, "d": -2}
+        assert layout.decode_registers(memory, ["str"]) == {"str": "abc"}
 
     def test_load(self, layout, data):
         loaded = registers.RegisterLayout.load(**data)
         print(loaded._variables)
         print(layout._variables)
         assert loaded == layout
+        assert hash(loaded) == hash(layout)
+
+    def test_pickle(self, layout):
+        # ``threaded.Server`` passes the layout to its child process.
+        values = {"str": "hello", "i": 3, "f": 1.0}
+        payload = layout.build_payload(values, as_registers=True)
+        loaded = pickle.loads(pickle.dumps(layout))
+        assert loaded == layout
+        assert loaded.build_payload(values, as_registers=True) == payload
 
 
 class TestPayloadBuilder:
@@ -274,3 +335,10 @@ class TestPayloadDecoder:
         builder = registers._PayloadDecoder(payload, byteorder, wordorder)
         var = registers.Number("", type)
         assert var.decode(builder) == expected
+
+    def test_from_registers(self):
+        decoder = registers._PayloadDecoder.from_registers(
+            [0x0004, 0x0300, 0x0204, 0x1000], byteorder="<", wordorder=">"
+        )
+        var = registers.Number("", "i64")
+        assert var.decode(decoder) == 288230389103853584
@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import socket
+import struct
 import pytest
 import time
 
@@ -17,7 +19,18 @@ from pymodbus.client.sync import ModbusTcpClient
 from pymodbus.server.sync import StartTcpServer
 
 
-@pytest.fixture
+_MISSING_LAYOUT = pytest.mark.parametrize(
+    "unit, error",
+    [
+        (3, exceptions.MissingSubLayoutError),
+        (4, exceptions.NoSuchSlaveLayoutError),
+    ],
+)
+
+(_F16,) = struct.unpack("e", struct.pack("e", 3.4))
+
+
+@pytest.fixture(scope="module")
 def holding_register_layout():
     return registers.RegisterLayout(
         [
@@ -37,7 +50,7 @@ def holding_register_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def input_register_layout():
     return registers.RegisterLayout(
         [
@@ -49,7 +62,7 @@ def input_register_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def coil_layout():
     return coils.CoilLayout(
         [
@@ -62,7 +75,7 @@ def coil_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def discrete_input_layout():
     return coils.CoilLayout(
         [
@@ -73,7 +86,7 @@ def discrete_input_layout():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def server_context_layout(
     holding_register_layout, input_register_layout, coil_layout, discrete_input_layout
 ):
@@ -134,6 +147,49 @@ def job(context):
     context.set_discrete_inputs({"result": result})
 
 
+class TestDaemon:
+    def test_wait(self):
+        calls = []
+        daemon = Daemon(calls.append, 0.01)
+        daemon.serve(None)
+        assert daemon.wait(timeout=1.0)
+        daemon.stop(timeout=1.0)
+        # One job may have been in progress when calling ``wait``.
+        assert len(calls) >= 2
+
+    def test_stop(self):
+        calls = []
+        daemon = Daemon(calls.append, 10.0)
+        daemon.serve(None)
+        # Must not block for the rest of the period.
+        daemon.stop(timeout=1.0)
+        assert len(calls) <= 1
+
+    def test_zero_period(self):
+        calls = []
+        daemon = Daemon(calls.append, 0)
+        daemon.serve(None)
+        assert daemon.wait(timeout=1.0)
+        daemon.stop(timeout=1.0)
+        assert len(calls) >= 2
+
+    def test_overrun_skips_missed_periods(self):
+        starts = []
+
+        def job():
+            starts.append(time.monotonic())
+            if len(starts) == 1:
+                time.sleep(0.25)
+
+        daemon = Daemon(job, 0.1)
+        daemon.serve()
+        assert daemon.wait(timeout=1.0)
+        daemon.stop(timeout=1.0)
+        # The first run overran two periods; the second run must wait
+        # for the next deadline instead of starting immediately.
+        assert starts[1] - starts[0] >= 0.29
+
+
 class TestServer:
     # We test that Server, Daemon and Client interact with each other
     # correctly!
@@ -174,86 +230,59 @@ class TestServer:
             server_layout,
             address=(host, port),
             context=context,
+            # Don't fail on reruns while the port is in TIME_WAIT.
+            allow_reuse_address=True,
         )
         server.start()
-        time.sleep(0.5)
         client = Client(ModbusTcpClient, server_layout, address=host, port=port)
-        client.start()
-
-        x, y, expected = 3, 5, False
-        client.write_holding_registers({"x": x, "y": y})
-        time.sleep(0.1)
-        result = client.read_discrete_inputs(variables={"result"})
-        assert result == {"result": expected}
-
-        x, y, expected = 6, 4, True
-        client.write_holding_registers({"x": x, "y": y})
-        time.sleep(0.1)
-        result = client.read_discrete_inputs(variables={"result"})
-        assert result == {"result": expected}
-
-        x, y, expected = 7, 7, False
-        client.write_holding_registers({"x": x, "y": y})
-        time.sleep(0.1)
-        result = client.read_discrete_inputs(variables={"result"})
-        assert result == {"result": expected}
+        client.start(timeout=5.0)
+
+        for x, y, expected in [(3, 5, False), (6, 4, True), (7, 7, False)]:
+            client.write_holding_registers({"x": x, "y": y})
+            # Wait for the daemon (running in the server process) to see
+            # the new values.
+            assert daemon.wait(timeout=1.0)
+            result = client.read_discrete_inputs(variables={"result"})
+            assert result == {"result": expected}
 
         client.stop()
         server.stop()
 
+    def test_start_on_occupied_port(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            sock.listen()
+            server = Server(StartTcpServer, address=sock.getsockname())
+            server.start()
+            with pytest.raises(exceptions.ServerError):
+                server.join(timeout=5.0)
+
 
 class TestClient:
     def test_variable_not_found(self, threaded_client):
         with pytest.raises(exceptions.VariableNotFoundError):
             threaded_client.write_holding_register("spam", 123)
 
-    def test_write_holding_registers_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.write_holding_registers({"a": 1}, unit=2)
-
-    def test_write_holding_register_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.write_holding_register("a", 1, unit=2)
-
-    def test_write_coils_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.write_coils({"a": 1}, unit=2)
-
-    def test_write_coil_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.write_coil("a", 1, unit=2)
-
-    def test_read_holding_register_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_holding_register("a", unit=2)
-
-    def test_read_holding_registers_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_holding_registers("a", unit=2)
-
-    def test_read_input_register_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_input_register("a", unit=2)
-
-    def test_read_input_registers_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_input_registers("a", unit=2)
-
-    def test_read_coil_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_coil("a", unit=2)
-
-    def test_read_coils_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_coils("a", unit=2)
-
-    def test_read_discrete_input_failure(self, threaded_client):
-        with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_discrete_input("a", unit=2)
-
-    def test_read_discrete_input_failure(self, threaded_client):
+    @pytest.mark.parametrize(
+        "op, args",
+        [
+            ("write_holding_registers", ({"a": 1},)),
+            ("write_holding_register", ("a", 1)),
+            ("write_coils", ({"a": 1},)),
+            ("write_coil", ("a", 1)),
+            ("read_holding_register", ("a",)),
+            ("read_holding_registers", ("a",)),
+            ("read_input_register", ("a",)),
+            ("read_input_registers", ("a",)),
+            ("read_coil", ("a",)),
+            ("read_coils", ("a",)),
+            ("read_discrete_input", ("a",)),
+            ("read_discrete_inputs", ({},)),
+        ],
+    )
+    def test_failure(self, op, args, threaded_client):
         with pytest.raises(exceptions.ModbusResponseError):
-            threaded_client.read_discrete_inputs({}, unit=2)
+            getattr(threaded_client, op)(*args, unit=2)
 
     def test_write_holding_registers_read_holding_registers(self, threaded_client):
         threaded_client.write_holding_registers(
@@ -276,7 +305,7 @@ class TestClient:
                 "ELEMENT_TYPE": 33,
                 "ELEMENT_ID": 7,
             },
-            "f": pytest.approx(3.4, abs=0.001),
+            "f": _F16,
         }
         threaded_client.write_holding_register("str", "world")
         assert threaded_client.read_holding_register("str") == "world"
@@ -286,20 +315,44 @@ class TestClient:
             "ELEMENT_TYPE": 33,
             "ELEMENT_ID": 7,
         }
-        assert threaded_client.read_holding_register("f") == pytest.approx(
-            3.4, abs=0.001
-        )
+        assert threaded_client.read_holding_register("f") == _F16
         assert threaded_client.read_holding_registers({"i", "str"}) == {
             "i": 12,
             "str": "world",
         }
 
+    def test_write_holding_registers_raw(self, threaded_client, server_context_layout):
+        layout = server_context_layout.get_holding_register_layout(1)
+        payload = layout.build_payload({"a": 4, "c": 6})
+        threaded_client.write_holding_registers_raw(payload, unit=1)
+        assert threaded_client.read_holding_registers({"a", "c"}, unit=1) == {
+            "a": 4,
+            "c": 6,
+        }
+
+    def test_execute_many(self, threaded_client):
+        responses = threaded_client.execute_many(
+            [
+                threaded.RpcCall("write_registers", 0, [7, 8], unit=1),
+                threaded.RpcCall("read_holding_registers", 0, 2, unit=1),
+            ]
+        )
+        assert len(responses) == 2
+        assert responses[1].registers == [7, 8]
+
     def test_read_input_registers(self, threaded_client):
         result = threaded_client.read_input_registers(unit=1)
         assert result["a"] == 0
         assert result["b"] == 0
         assert result["c"] == 0
 
+    def test_read_input_registers_out(self, threaded_client):
+        out = {"spam": 1}
+        result = threaded_client.read_input_registers(unit=1, out=out)
+        assert result is out
+        assert "spam" not in out
+        assert (out["a"], out["b"], out["c"]) == (0, 0, 0)
+
     def test_multiple_slaves(self, threaded_client):
         threaded_client.write_holding_registers({"a": 1, "b": 2, "c": 3}, unit=1)
         threaded_client.write_holding_register("str", "world", unit=0)
@@ -318,6 +371,14 @@ class TestClient:
         threaded_client.write_coils(values)
         assert threaded_client.read_coils() == values
 
+    def test_write_coil_read_coil(self, threaded_client):
+        threaded_client.write_coil("y", 1)
+        assert threaded_client.read_coil("y") == 1
+        threaded_client.write_coil("y", 0)
+        assert threaded_client.read_coil("y") == 0
+        threaded_client.write_coil("v", [1, 0])
+        assert threaded_client.read_coil("v") == [1, 0]
+
     def test_read_discrete_inputs(self, threaded_client):
         assert threaded_client.read_discrete_inputs(unit=1) == {
             "a": 0,
@@ -326,133 +387,23 @@ class TestClient:
         }
 
     @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_input_registers_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_input_registers(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_input_register_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_input_register("", unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_discrete_inputs_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_discrete_inputs(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_discrete_input_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_discrete_input("", unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_holding_registers_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_holding_registers(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_holding_register_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_holding_register("", unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_write_holding_registers_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.write_holding_registers({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_write_holding_register_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.write_holding_register("", 0, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_coils_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_coils(unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_read_coil_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.read_coil("", unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
-        [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
-        ],
-    )
-    def test_write_coils_missing_layout(self, unit, error, threaded_client):
-        with pytest.raises(error):
-            threaded_client.write_coils({}, unit=unit)
-
-    @pytest.mark.parametrize(
-        "unit, error",
+        "op, args",
         [
-            (3, exceptions.MissingSubLayoutError),
-            (4, exceptions.NoSuchSlaveLayoutError),
+            ("read_input_registers", ()),
+            ("read_input_register", ("",)),
+            ("read_discrete_inputs", ()),
+            ("read_discrete_input", ("",)),
+            ("read_holding_registers", ()),
+            ("read_holding_register", ("",)),
+            ("write_holding_registers", ({},)),
+            ("write_holding_register", ("", 0)),
+            ("read_coils", ()),
+            ("read_coil", ("",)),
+            ("write_coils", ({},)),
+            ("write_coil", ("", 0)),
         ],
     )
-    def test_write_coil_missing_layout(self, unit, error, threaded_client):
+    @_MISSING_LAYOUT
+    def test_missing_layout(self, op, args, unit, error, threaded_client):
         with pytest.raises(error):
-            threaded_client.write_coil("", 0, unit=unit)
+            getattr(threaded_client, op)(*args, unit=unit)